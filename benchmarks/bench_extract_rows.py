@@ -0,0 +1,38 @@
+import sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from bs4 import BeautifulSoup
+from scraping_bs4 import get_header_map, extract_rows, iter_rows
+from stub_server import render_page
+
+# Compare the full-tree BeautifulSoup parser against the streaming lxml parser.
+# Usage: python benchmarks/bench_extract_rows.py [saved_page.html ...]
+
+def full_tree(html):
+    soup = BeautifulSoup(html, "lxml")
+    return extract_rows(soup, get_header_map(soup))
+
+def streaming(html):
+    return sum(1 for _ in iter_rows(html))
+
+def measure(fn, html, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(html); best = min(best, time.perf_counter() - t)
+    tracemalloc.start(); fn(html)
+    _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return best, peak / 2**20
+
+def main(paths):
+    pages = [(Path(p).name, Path(p).read_text(encoding="utf-8")) for p in paths]
+    if not pages:
+        pages = [(f"rendered_{n}", render_page(n, first_rows=n)) for n in (250, 1250, 5000)]
+    print(f"{'page':>16} {'KB':>7} | {'full s':>7} {'full MB':>8} | {'stream s':>8} {'stream MB':>9} | speedup")
+    for name, html in pages:
+        ft, fm = measure(full_tree, html)
+        st, sm = measure(streaming, html)
+        print(f"{name:>16} {len(html) / 1024:7.0f} | {ft:7.3f} {fm:8.1f} | {st:8.3f} {sm:9.1f} | {ft / st:6.1f}x")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
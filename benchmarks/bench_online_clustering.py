@@ -0,0 +1,38 @@
+import sys, time, numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sklearn.cluster import KMeans
+from cluster_model import FEATURES, fit
+from cluster_online import OnlineClusterer
+from output import read_frame
+
+# Full KMeans refit over all accumulated rows vs. one mini-batch update per new
+# increment, as snapshots pile up. Rows are resampled (with noise) from a real scrape.
+# Usage: python benchmarks/bench_online_clustering.py [snapshot.csv] [increment_rows] [steps]
+
+def synthetic(base, n, rng):
+    rows = base[rng.integers(0, len(base), n)]
+    return rows * rng.lognormal(0, 0.05, rows.shape)
+
+def main(src="coingecko_api.csv", increment=50_000, steps=6):
+    base = read_frame(src)[FEATURES].dropna().to_numpy(dtype=np.float64)
+    model, _, _ = fit(base)
+    online = OnlineClusterer(model)
+    rng = np.random.default_rng(0)
+    seen = [base]
+    print(f"{'rows':>10} | {'refit s':>8} | {'update s':>8} | {'max drift':>9}")
+    for _ in range(steps):
+        new = synthetic(base, increment, rng); seen.append(new)
+        X = np.vstack(seen)
+        t = time.perf_counter()
+        Xs = (X - model["mean"]) / model["scale"]
+        KMeans(n_clusters=len(model["centroids"]), random_state=42).fit(Xs)
+        refit = time.perf_counter() - t
+        t = time.perf_counter(); report = online.partial_fit(new); update = time.perf_counter() - t
+        print(f"{len(X):>10} | {refit:8.3f} | {update:8.4f} | {report['max_drift']:9.4f}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0] if args else "coingecko_api.csv",
+         int(args[1]) if len(args) > 1 else 50_000, int(args[2]) if len(args) > 2 else 6)
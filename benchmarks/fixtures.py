@@ -0,0 +1,65 @@
+import sys, json, math
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from output import read_frame
+from stub_server import render_page
+
+# ---------- Recorded fixtures ----------
+# Built deterministically from the committed scrape CSVs, so every checkout
+# benchmarks against byte-identical inputs without touching CoinGecko.
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+SOURCE_CSV = ROOT / "coingecko_api.csv"
+HTML_SIZES = [100, 500, 1250, 5000]
+API_PER_PAGE = 250
+
+API_FIELDS = {
+    "market_cap_rank": "Rank", "name": "Name", "symbol": "Symbol", "current_price": "Price",
+    "price_change_percentage_1h_in_currency": "Change_1h", "price_change_percentage_24h_in_currency": "Change_24h",
+    "price_change_percentage_7d_in_currency": "Change_7d", "price_change_percentage_30d_in_currency": "Change_30d",
+    "total_volume": "Volume_24h", "circulating_supply": "Circulating_Supply", "total_supply": "Total_Supply",
+    "market_cap": "Market_Cap",
+}
+
+def coins_from_csv(path=SOURCE_CSV):
+    df = read_frame(path)
+    coins = []
+    for rec in df.to_dict(orient="records"):
+        coin = {k: (None if rec[c] is None or rec[c] != rec[c] else rec[c]) for k, c in API_FIELDS.items()}
+        coin["market_cap_rank"] = int(coin["market_cap_rank"]) if coin["market_cap_rank"] is not None else None
+        coin["symbol"] = (coin["symbol"] or "").lower()
+        coin["id"] = "-".join((coin["name"] or "").lower().split())
+        coins.append(coin)
+    return coins
+
+def tiled(coins, n):
+    # Repeat the recorded table with shifted ranks to reach larger sizes
+    out = []
+    for i in range(n):
+        c = dict(coins[i % len(coins)]); c["market_cap_rank"] = i + 1; out.append(c)
+    return out
+
+def build(directory=FIXTURE_DIR, source=SOURCE_CSV):
+    directory = Path(directory); directory.mkdir(parents=True, exist_ok=True)
+    coins = coins_from_csv(source)
+    (directory / "coins.json").write_text(json.dumps(coins), encoding="utf-8")
+    for page in range(1, math.ceil(len(coins) / API_PER_PAGE) + 1):
+        chunk = coins[(page - 1) * API_PER_PAGE: page * API_PER_PAGE]
+        (directory / f"api_page_{page}.json").write_text(json.dumps(chunk), encoding="utf-8")
+    for n in HTML_SIZES:
+        (directory / f"page_{n}.html").write_text(render_page(n, first_rows=n, coins=tiled(coins, n)), encoding="utf-8")
+    return directory
+
+def load_coins(directory=FIXTURE_DIR):
+    path = Path(directory) / "coins.json"
+    if not path.exists(): build(directory)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def html_fixtures(directory=FIXTURE_DIR):
+    directory = Path(directory)
+    if not all((directory / f"page_{n}.html").exists() for n in HTML_SIZES): build(directory)
+    return {n: (directory / f"page_{n}.html").read_text(encoding="utf-8") for n in HTML_SIZES}
+
+if __name__ == "__main__":
+    print(f" fixtures → {build(*sys.argv[1:2])}")
@@ -0,0 +1,128 @@
+import sys, os, json, time, argparse, platform, statistics, subprocess, tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT)); sys.path.insert(0, str(Path(__file__).resolve().parent))
+import numpy as np, pandas as pd
+from fixtures import FIXTURE_DIR, load_coins, html_fixtures
+
+# Offline benchmark suite: every input is a recorded fixture, every HTTP call goes
+# to stub_server.py, so numbers are comparable across commits.
+# Usage: python benchmarks/run_benchmarks.py [--quick] [--out results.json] [--compare old.json]
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+REGRESSION = 0.20      # flag anything >20% slower than the baseline
+
+def timeit(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+    return {"best_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+def record(results, name, stats, rows=None):
+    if rows: stats["rows"], stats["rows_per_s"] = rows, round(rows / stats["best_s"], 1)
+    results[name] = stats
+    extra = f"  {stats['rows_per_s']:>12,.0f} rows/s" if rows else ""
+    print(f"  {name:<34} {stats['best_s'] * 1000:10.2f} ms{extra}")
+
+# ======================= Suites =======================
+def bench_parse(results, repeat, quick):
+    from bs4 import BeautifulSoup
+    from scraping_bs4 import get_header_map, extract_rows, iter_rows
+    from scraping_api import coin_to_row
+    pages = html_fixtures()
+    for n, html in pages.items():
+        if quick and n > 1250: continue
+        def full(): soup = BeautifulSoup(html, "lxml"); extract_rows(soup, get_header_map(soup))
+        record(results, f"parse.bs4_full_tree.{n}", timeit(full, repeat), n)
+        record(results, f"parse.iter_rows.{n}", timeit(lambda: sum(1 for _ in iter_rows(html)), repeat), n)
+    raw = [(FIXTURE_DIR / f"api_page_{p}.json").read_text(encoding="utf-8") for p in range(1, 6)]
+    def api(): return [coin_to_row(c) for page in raw for c in json.loads(page)]
+    record(results, "parse.api_json", timeit(api, repeat), len(api()))
+
+def bench_normalize(results, repeat, quick):
+    from normalize import typed_frame
+    legacy = pd.read_csv(ROOT / "coingecko_bs4.csv", dtype=str)   # "$1,234" / "0.4%" / "19.94M"
+    big = legacy if quick else pd.concat([legacy] * 20, ignore_index=True)
+    record(results, f"normalize.typed_frame.{len(big)}", timeit(lambda: typed_frame(big), repeat), len(big))
+
+def bench_cluster(results, repeat, quick):
+    from output import read_frame
+    from cluster_model import FEATURES, fit, predict_frame
+    from cluster_online import OnlineClusterer
+    df = read_frame(ROOT / "coingecko_api.csv").dropna(subset=FEATURES)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    record(results, "cluster.fit", timeit(lambda: fit(X), max(1, repeat // 2)), len(X))
+    model, _, _ = fit(X)
+    record(results, "cluster.predict", timeit(lambda: predict_frame(model, df), repeat), len(df))
+    big = np.repeat(X, 1 if quick else 40, axis=0)
+    record(results, f"cluster.online_update.{len(big)}", timeit(lambda: OnlineClusterer(model).partial_fit(big), repeat), len(big))
+
+def bench_e2e(results, repeat, quick):
+    import contextlib, io
+    from stub_server import start_stub_server, MARKETS_PATH, PAGE_PATH
+    from scrape import run, ScrapeConfig
+    srv, base = start_stub_server(coins=load_coins())
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            "e2e.api_async": ("api", ScrapeConfig(url=base + MARKETS_PATH, concurrency=4, rate=1000, output=os.path.join(tmp, "api.csv"))),
+            "e2e.direct": ("direct", ScrapeConfig(url=base + PAGE_PATH, concurrency=8, output=os.path.join(tmp, "direct.csv"))),
+        }
+        for name, (backend, cfg) in cases.items():
+            reports = []
+            def once():
+                with contextlib.redirect_stdout(io.StringIO()): reports.append(run(backend, cfg)[1])
+            stats = timeit(once, max(1, repeat // 2))
+            stats["stages"] = reports[-1]["stages"]
+            record(results, name, stats, reports[-1]["rows"])
+    srv.shutdown()
+
+SUITES = {"parse": bench_parse, "normalize": bench_normalize, "cluster": bench_cluster, "e2e": bench_e2e}
+
+# ======================= Results =======================
+def git_rev():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError: return None
+
+def compare(old, new, threshold=REGRESSION):
+    print(f"\nvs {old['meta'].get('commit')} ({old['meta'].get('time')}):")
+    worse = []
+    for name, r in new["results"].items():
+        o = old["results"].get(name)
+        if not o: continue
+        ratio = r["best_s"] / o["best_s"]
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        if flag: worse.append(name)
+        print(f"  {name:<34} {o['best_s'] * 1000:9.2f} → {r['best_s'] * 1000:9.2f} ms  ({ratio:5.2f}x){flag}")
+    return worse
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("suites", nargs="*", metavar="suite", help=f"any of: {', '.join(SUITES)} (default: all)")
+    p.add_argument("--quick", action="store_true", help="smaller inputs, fewer repeats")
+    p.add_argument("--out", help="results JSON path (default: benchmarks/results/<commit>-<time>.json)")
+    p.add_argument("--compare", help="baseline results JSON; exit 1 on regressions")
+    args = p.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown: p.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    repeat = 2 if args.quick else 5
+
+    results = {}
+    for name in args.suites or SUITES:
+        print(f"[{name}]")
+        SUITES[name](results, repeat, args.quick)
+
+    meta = {"commit": git_rev(), "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "quick": args.quick,
+            "python": platform.python_version(), "platform": platform.platform(), "pandas": pd.__version__, "numpy": np.__version__}
+    out = {"meta": meta, "results": results}
+    path = Path(args.out) if args.out else RESULTS_DIR / f"{meta['commit'] or 'nogit'}-{meta['time'].replace(':', '')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(f"\n results → {path}")
+    if args.compare:
+        worse = compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), out)
+        if worse: sys.exit(1)
+    return out
+
+if __name__ == "__main__":
+    main()
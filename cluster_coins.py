@@ -1,227 +1,155 @@
+import time
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
 import numpy as np
+import metrics
+from output import read_frame, write_csv_parts
+from normalize import compact_frame
+from coin_index import CoinIndex, INDEX_PATH
+from cluster_model import FEATURES, MODEL_PATH, fit, save_model, predict, project
+from cluster_report import STAT_COLUMNS, cluster_stats, format_stats, plot_data, render_figures, render_in_background, build_report, write_report
+
+RENDER_IN_BACKGROUND = False   # True: figures render in a separate process while the report is written
+metrics.configure(port=metrics.PORT)   # METRICS_LOG=path / METRICS_PORT=n to enable
 
 # Load your full CSV (from scraping)
-df = pd.read_csv("coingecko_bs4.csv")  # or "coingecko_selenium.csv"
+# compact=True: float32 percentages, categorical names, Int16 rank (see normalize.COMPACT_DTYPES);
+# the model features stay float64 so fits and averages match the full-precision data
+df = read_frame("coingecko_bs4.csv", compact=True, exact=FEATURES)  # or "coingecko_selenium.csv" / "coingecko_api.parquet"
 print("Before cleaning:", len(df), "rows")
 
 
 # --- Clean numeric columns ---
-def clean_money(x):
-    if isinstance(x, str):
-        x = x.replace("$", "").replace(",", "").strip()
-    try:
-        return float(x)
-    except:
-        return None
-
-
-def clean_pct(x):
-    if isinstance(x, str):
-        x = x.replace("%", "").strip()
-    try:
-        return float(x)
-    except:
-        return None
-
-
-for col in ["Price", "Change_24h", "Change_7d", "Market_Cap"]:
-    if "Change" in col:
-        df[col] = df[col].apply(clean_pct)
-    else:
-        df[col] = df[col].apply(clean_money)
+# read_frame returns typed numeric columns; legacy "$1,234" / "0.4%" / "19.94M" CSVs are parsed on load
 
 # Drop rows that are totally empty in these columns
-df = df.dropna(subset=["Price", "Change_24h", "Change_7d", "Market_Cap"])
+rows_before = len(df)
+df = df.dropna(subset=FEATURES)
 print("After cleaning:", len(df), "rows")
+metrics.ROWS_DROPPED.inc(rows_before - len(df), stage="dropna")
+metrics.event("cleaning", rows_before=rows_before, rows_after=len(df), dropped=rows_before - len(df))
 
 # --- Define top 20 well-known coins to TEST ---
-# Based on your format: "BitcoinBTC", "EthereumETH", etc.
+# (name, symbol) pairs — resolved through the coin index, whatever format the scrape used
 test_coins = [
-    "BitcoinBTC",
-    "EthereumETH",
-    "TetherUSDT",
-    "BNBBNB",
-    "XRPXRP",
-    "SolanaSOL",
-    "USDCUSDC",
-    "DogecoinDOGE",
-    "CardanoADA",
-    "TRONTRX",
-    "ChainlinkLINK",
-    "PolkadotDOT",
-    "AvalancheAVAX",
-    "Shiba InuSHIB",
-    "LitecoinLTC",
-    "UniswapUNI",
-    "StellarXLM",
-    "PolygonMATIC",
-    "Bitcoin CashBCH",
-    "AlgorandALGO"
+    ("Bitcoin", "BTC"),
+    ("Ethereum", "ETH"),
+    ("Tether", "USDT"),
+    ("BNB", "BNB"),
+    ("XRP", "XRP"),
+    ("Solana", "SOL"),
+    ("USDC", "USDC"),
+    ("Dogecoin", "DOGE"),
+    ("Cardano", "ADA"),
+    ("TRON", "TRX"),
+    ("Chainlink", "LINK"),
+    ("Polkadot", "DOT"),
+    ("Avalanche", "AVAX"),
+    ("Shiba Inu", "SHIB"),
+    ("Litecoin", "LTC"),
+    ("Uniswap", "UNI"),
+    ("Stellar", "XLM"),
+    ("Polygon", "MATIC"),
+    ("Bitcoin Cash", "BCH"),
+    ("Algorand", "ALGO")
 ]
 
-# Make search case-insensitive
-test_coins_lower = [coin.lower() for coin in test_coins]
-
-# Split based on coin name (assuming you have a 'Name' or 'Coin' column)
-# Adjust column name if needed: 'Name', 'Coin', 'Symbol', etc.
-name_column = 'Name'  # Change this if your column is different
-
-if name_column not in df.columns:
-    print(f"⚠️  Column '{name_column}' not found. Available columns:")
-    print(df.columns.tolist())
-    # Try to find the right column
-    possible_names = ['Name', 'Coin', 'Symbol', 'name', 'coin', 'symbol']
-    for col in possible_names:
-        if col in df.columns:
-            name_column = col
-            print(f"✅ Using column: {name_column}")
-            break
-
-# Create a mask for test coins
-test_mask = df[name_column].str.lower().isin(test_coins_lower)
-
-test_df = df[test_mask].copy()
-train_df = df[~test_mask].copy()
-
-print(f"\n📊 Training set: {len(train_df)} coins (excluding famous coins)")
-print(f"📊 Test set: {len(test_df)} well-known coins")
+# Canonical coin identity: splits "BitcoinBTC" / "Bitcoin BTC" into Coin_Name + Coin_Symbol
+# (Name stays as scraped) and gives every row a stable integer Coin_Key, persisted across
+# snapshots in coin_index.json. Unconfirmed splits are keyed provisionally on the raw name,
+# so no API snapshot has to be indexed first; the key carries over once one confirms it.
+index = CoinIndex.load(INDEX_PATH)
+for name, symbol in test_coins:
+    index.add(symbol, name)
+df = compact_frame(index.canonical(df), exact=FEATURES)
+if (df["Coin_Key"] < 0).any(): raise ValueError("rows without a Coin_Key (empty Name)")
+index.save(INDEX_PATH)
+name_column = 'Name'
+
+# Create a mask for test coins (integer key membership, no string matching)
+test_mask = df["Coin_Key"].isin(index.keys_for(test_coins)).to_numpy()
+
+# Train/test are row positions into the one frame, not copies of it
+train_idx, test_idx = np.flatnonzero(~test_mask), np.flatnonzero(test_mask)
+names = df[name_column].to_numpy()
+X = df[FEATURES].to_numpy(dtype=np.float64)
+
+print(f"\n📊 Training set: {len(train_idx)} coins (excluding famous coins)")
+print(f"📊 Test set: {len(test_idx)} well-known coins")
 print("\nTest coins found:")
-print(test_df[name_column].tolist())
+print(names[test_idx].tolist())
 
-if len(test_df) < 10:
-    print(f"\n⚠️  Warning: Only found {len(test_df)} test coins. They might have different names in your data.")
+if len(test_idx) < 10:
+    print(f"\n⚠️  Warning: Only found {len(test_idx)} test coins. They might have different names in your data.")
     print("Showing first 20 coin names from your data:")
     print(df[name_column].head(20).tolist())
 
-# --- Prepare training data ---
-X_train = train_df[["Price", "Change_24h", "Change_7d", "Market_Cap"]]
-
-# Fit scaler on training data only
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-
-# --- K-Means clustering (train on all coins except top 20) ---
-kmeans = KMeans(n_clusters=5, random_state=42)
-train_df["Cluster"] = kmeans.fit_predict(X_train_scaled)
+# --- Fit scaler + K-Means + PCA on training data only (train on all coins except top 20) ---
+t = time.perf_counter()
+model, train_labels, reduced_train = fit(X[train_idx], n_clusters=5, random_state=42)
+fit_s = time.perf_counter() - t
+metrics.FIT_SECONDS.set(fit_s, model="kmeans")
+metrics.event("fit", seconds=round(fit_s, 4), rows=len(train_idx), n_clusters=5)
+clusters = np.full(len(df), -1, dtype=np.int16); clusters[train_idx] = train_labels
+pcs = np.full((len(df), 2), np.nan); pcs[train_idx] = reduced_train   # PCA for visualization
+save_model(model, MODEL_PATH)
 
 print("\n✅ Training completed!")
+print(f"Model saved to {MODEL_PATH} (predict-only: python cluster_model.py <snapshot>)")
 print("Cluster distribution (Training):")
-print(train_df["Cluster"].value_counts().sort_index())
-
-# --- PCA for visualization (fit on training data) ---
-pca = PCA(n_components=2)
-reduced_train = pca.fit_transform(X_train_scaled)
-train_df["PC1"], train_df["PC2"] = reduced_train[:, 0], reduced_train[:, 1]
+print(pd.Series(clusters[train_idx], name="Cluster").value_counts().sort_index())
 
 # --- Predict clusters for test data (top 20 well-known coins) ---
-if len(test_df) > 0:
-    X_test = test_df[["Price", "Change_24h", "Change_7d", "Market_Cap"]]
-    X_test_scaled = scaler.transform(X_test)  # Use same scaler
-    test_df["Cluster"] = kmeans.predict(X_test_scaled)  # Predict clusters
+if len(test_idx) > 0:
+    clusters[test_idx] = predict(model, X[test_idx])  # Same scaler + centroids, NumPy only
 
     print("\n✅ Test set prediction completed!")
     print("Cluster distribution (Test - Famous Coins):")
-    print(test_df["Cluster"].value_counts().sort_index())
+    print(pd.Series(clusters[test_idx], name="Cluster").value_counts().sort_index())
 
     # Transform test data with same PCA
-    reduced_test = pca.transform(X_test_scaled)
-    test_df["PC1"], test_df["PC2"] = reduced_test[:, 0], reduced_test[:, 1]
+    pcs[test_idx] = project(model, X[test_idx])
 
     # Show which cluster each famous coin belongs to
     print("\n🌟 Famous Coins Cluster Assignment:")
-    for _, row in test_df.iterrows():
-        print(f"  {row[name_column]:20s} → Cluster {row['Cluster']}")
+    print("\n".join(f"  {name:20s} → Cluster {cluster}" for name, cluster in zip(names[test_idx], clusters[test_idx])))
 
-# --- Save results ---
-train_df.to_csv("coins_clustered_train.csv", index=False)
-if len(test_df) > 0:
-    test_df.to_csv("coins_clustered_test.csv", index=False)
+df["Cluster"], df["PC1"], df["PC2"] = clusters, pcs[:, 0], pcs[:, 1]
 
-# Combine for full dataset with predictions
-full_df = pd.concat([train_df, test_df], ignore_index=True)
-full_df.to_csv("coins_clustered_full.csv", index=False)
+# --- Save results: train, test and full (train then test) in one formatting pass ---
+parts = [("coins_clustered_train.csv", train_idx)] + ([("coins_clustered_test.csv", test_idx)] if len(test_idx) else [])
+write_csv_parts(df, parts, combined="coins_clustered_full.csv")
 
 print(f"\n💾 Saved:")
-print(f"  - coins_clustered_train.csv ({len(train_df)} rows)")
-if len(test_df) > 0:
-    print(f"  - coins_clustered_test.csv ({len(test_df)} rows)")
-print(f"  - coins_clustered_full.csv ({len(full_df)} rows)")
+print(f"  - coins_clustered_train.csv ({len(train_idx)} rows)")
+if len(test_idx) > 0:
+    print(f"  - coins_clustered_test.csv ({len(test_idx)} rows)")
+print(f"  - coins_clustered_full.csv ({len(df)} rows)")
+
+# Row subsets for the report stage, materialized for the columns it reads only
+report_cols = [df.columns.get_loc(c) for c in [name_column, "Cluster", "PC1", "PC2"] + STAT_COLUMNS]
+train_df, test_df = df.iloc[train_idx, report_cols], df.iloc[test_idx, report_cols]
 
-# --- Visualizations ---
+# --- Visualizations (headless; see cluster_report.py) ---
+renderer = None
 if len(test_df) > 0:
-    # Plot: Training data
-    plt.figure(figsize=(14, 6))
-
-    plt.subplot(1, 2, 1)
-    plt.scatter(train_df["PC1"], train_df["PC2"], c=train_df["Cluster"],
-                cmap="tab10", alpha=0.6, edgecolors='k', linewidth=0.5, s=20)
-    plt.xlabel("PC1")
-    plt.ylabel("PC2")
-    plt.title(f"Training Set ({len(train_df)} coins)")
-    plt.colorbar(label="Cluster")
-
-    # Plot: Test data (famous coins)
-    plt.subplot(1, 2, 2)
-    scatter = plt.scatter(test_df["PC1"], test_df["PC2"], c=test_df["Cluster"],
-                          cmap="tab10", alpha=0.8, edgecolors='k', linewidth=2, s=200, marker='*')
-    plt.xlabel("PC1")
-    plt.ylabel("PC2")
-    plt.title(f"Test Set ({len(test_df)} Famous Coins)")
-    plt.colorbar(label="Cluster")
-
-    # Add labels for famous coins
-    for _, row in test_df.iterrows():
-        plt.annotate(row[name_column], (row["PC1"], row["PC2"]),
-                     fontsize=8, ha='right', alpha=0.7)
-
-    plt.tight_layout()
-    plt.savefig("cluster_comparison.png", dpi=150)
-    print("\n📊 Visualization saved as cluster_comparison.png")
-    plt.show()
-
-    # Combined visualization
-    plt.figure(figsize=(12, 10))
-    plt.scatter(train_df["PC1"], train_df["PC2"], c=train_df["Cluster"],
-                cmap="tab10", alpha=0.3, label="Training coins", s=20)
-    plt.scatter(test_df["PC1"], test_df["PC2"], c=test_df["Cluster"],
-                cmap="tab10", alpha=1.0, marker="*", s=300,
-                edgecolors='black', linewidth=2, label="Famous coins")
-
-    # Add labels for famous coins
-    for _, row in test_df.iterrows():
-        plt.annotate(row[name_column], (row["PC1"], row["PC2"]),
-                     fontsize=9, fontweight='bold', ha='right')
-
-    plt.xlabel("PC1")
-    plt.ylabel("PC2")
-    plt.title("Combined View: Training vs Famous Test Coins")
-    plt.legend()
-    plt.savefig("cluster_combined.png", dpi=150)
-    print("📊 Combined visualization saved as cluster_combined.png")
-    plt.show()
+    data = plot_data(train_df, test_df)
+    if RENDER_IN_BACKGROUND:
+        renderer = render_in_background(data)
+    else:
+        render_figures(data)
+        print("\n📊 Visualizations saved as cluster_comparison.png and cluster_combined.png")
 
 # --- Cluster characteristics (for evaluation) ---
 print("\n📈 Cluster Characteristics (Training Set):")
-for cluster in sorted(train_df["Cluster"].unique()):
-    cluster_data = train_df[train_df["Cluster"] == cluster]
-    print(f"\nCluster {cluster} ({len(cluster_data)} coins):")
-    print(f"  Price: ${cluster_data['Price'].mean():.2f} (avg)")
-    print(f"  24h Change: {cluster_data['Change_24h'].mean():.2f}% (avg)")
-    print(f"  7d Change: {cluster_data['Change_7d'].mean():.2f}% (avg)")
-    print(f"  Market Cap: ${cluster_data['Market_Cap'].mean():,.0f} (avg)")
+print(format_stats(cluster_stats(train_df)))
 
 if len(test_df) > 0:
     print("\n📈 Cluster Characteristics (Test Set - Famous Coins):")
-    for cluster in sorted(test_df["Cluster"].unique()):
-        cluster_data = test_df[test_df["Cluster"] == cluster]
-        coin_names = cluster_data[name_column].tolist()
-        print(f"\nCluster {cluster}: {coin_names}")
-        print(f"  Price: ${cluster_data['Price'].mean():.2f} (avg)")
-        print(f"  24h Change: {cluster_data['Change_24h'].mean():.2f}% (avg)")
-        print(f"  7d Change: {cluster_data['Change_7d'].mean():.2f}% (avg)")
-        print(f"  Market Cap: ${cluster_data['Market_Cap'].mean():,.0f} (avg)")
\ No newline at end of file
+    print(format_stats(cluster_stats(test_df, names=True)))
+
+json_name, html_name = write_report(build_report(train_df, test_df, model))
+if renderer is not None:
+    renderer.wait()
+    print("\n📊 Visualizations saved as cluster_comparison.png and cluster_combined.png")
+print(f"\n📝 Report saved as {html_name} and {json_name}")
+metrics.flush(command="cluster_coins")
@@ -0,0 +1,90 @@
+import sys, json, time, numpy as np
+
+# ---------- Shared config ----------
+FEATURES = ["Price", "Change_24h", "Change_7d", "Market_Cap"]
+MODEL_PATH = "coins_cluster_model.npz"
+MODEL_FORMAT = 1      # bump when the artifact layout changes
+ARRAYS = ["mean", "scale", "centroids", "pca_mean", "pca_components"]
+
+# ======================= Fit (sklearn) =======================
+def fit(X, n_clusters=5, random_state=42, n_components=2):
+    # Only the fit needs sklearn; everything it learns is exported as plain arrays
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import PCA
+    X = np.asarray(X, dtype=np.float64)
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state)
+    labels = kmeans.fit_predict(Xs)
+    pca = PCA(n_components=n_components)
+    reduced = pca.fit_transform(Xs)
+    model = {
+        "mean": scaler.mean_, "scale": scaler.scale_,
+        "centroids": kmeans.cluster_centers_,
+        "pca_mean": pca.mean_, "pca_components": pca.components_,
+        "meta": {
+            "format": MODEL_FORMAT, "features": FEATURES, "n_clusters": n_clusters,
+            "random_state": random_state, "n_train": int(len(X)),
+            "counts": np.bincount(labels, minlength=n_clusters).tolist(),
+            "inertia": float(kmeans.inertia_), "fitted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+    }
+    return model, labels, reduced
+
+# ======================= Artifact =======================
+def save_model(model, path=MODEL_PATH):
+    np.savez(path, meta=np.array(json.dumps(model["meta"])), **{k: model[k] for k in ARRAYS})
+    return path
+
+def load_model(path=MODEL_PATH):
+    with np.load(path, allow_pickle=False) as z:
+        model = {k: z[k] for k in ARRAYS}
+        model["meta"] = json.loads(str(z["meta"]))
+    if model["meta"].get("format") != MODEL_FORMAT:
+        raise ValueError(f"{path}: model format {model['meta'].get('format')} != {MODEL_FORMAT}; refit with cluster_coins.py")
+    return model
+
+# ======================= Predict (NumPy only) =======================
+def scale(model, X):
+    return (np.asarray(X, dtype=np.float64) - model["mean"]) / model["scale"]
+
+def nearest(centroids, Xs):
+    # argmin ||x - c||² without materialising the (n, k, d) difference tensor
+    d = (Xs * Xs).sum(1)[:, None] - 2 * Xs @ centroids.T + (centroids * centroids).sum(1)[None, :]
+    return d.argmin(1)
+
+def predict(model, X):
+    Xs = scale(model, X)
+    labels = np.full(len(Xs), -1, dtype=np.int64)
+    ok = np.isfinite(Xs).all(1)           # rows with missing features stay unassigned (-1)
+    labels[ok] = nearest(model["centroids"], Xs[ok])
+    return labels
+
+def project(model, X):
+    return (scale(model, X) - model["pca_mean"]) @ model["pca_components"].T
+
+def predict_frame(model, df):
+    X = df[model["meta"]["features"]].to_numpy(dtype=np.float64)
+    out = df.copy()
+    out["Cluster"] = predict(model, X)
+    reduced = project(model, X)
+    out["PC1"], out["PC2"] = reduced[:, 0], reduced[:, 1]
+    return out
+
+# ======================= Run (predict-only) =======================
+if __name__ == "__main__":
+    # python cluster_model.py <snapshot.csv|.parquet> [model.npz] [out.csv]
+    from output import read_frame
+    src = sys.argv[1] if len(sys.argv) > 1 else "coingecko_api.csv"
+    model_path = sys.argv[2] if len(sys.argv) > 2 else MODEL_PATH
+    out_name = sys.argv[3] if len(sys.argv) > 3 else "coins_predicted.csv"
+
+    model = load_model(model_path)
+    df = read_frame(src)
+    t = time.perf_counter()
+    out = predict_frame(model, df)
+    ms = (time.perf_counter() - t) * 1000
+    out.to_csv(out_name, index=False)
+    print(f" predict → {len(out)} rows in {ms:.1f} ms ({(out['Cluster'] < 0).sum()} unassigned) → {out_name}")
+    print(out["Cluster"].value_counts().sort_index())
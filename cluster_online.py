@@ -0,0 +1,85 @@
+import os, sys, time, numpy as np, pandas as pd
+from cluster_model import MODEL_PATH, load_model, save_model, scale, nearest
+from normalize import typed_frame
+
+# ---------- Shared config ----------
+CHUNK_ROWS = 50_000
+BATCH_SIZE = 1024
+
+# ======================= Chunked input =======================
+def iter_chunks(paths, chunk_rows=CHUNK_ROWS, columns=None):
+    # Typed frames of at most chunk_rows rows from CSV/Parquet files, one at a time
+    for path in [paths] if isinstance(paths, (str, os.PathLike)) else paths:
+        if str(path).endswith((".parquet", ".pq")):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+                yield typed_frame(batch.to_pandas())
+        else:
+            for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=columns):
+                yield typed_frame(chunk)
+
+# ======================= Online K-Means =======================
+class OnlineClusterer:
+    # Mini-batch K-Means (Sculley, 2010) warm-started from a saved artifact. Each
+    # centroid moves toward its batch mean with step n_batch / n_seen, so the
+    # update costs O(batch) and old data never has to be revisited. The scaler
+    # stays fixed to the artifact's so new labels are comparable with old ones.
+    def __init__(self, model, batch_size=BATCH_SIZE):
+        self.model = model
+        self.centroids = np.array(model["centroids"], dtype=np.float64)
+        k = len(self.centroids)
+        counts = model["meta"].get("counts") or [model["meta"].get("n_train", k) / k] * k
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.batch_size = batch_size
+        self.updates = model["meta"].get("updates", 0)
+
+    @classmethod
+    def from_artifact(cls, path=MODEL_PATH, **kwargs):
+        return cls(load_model(path), **kwargs)
+
+    def _step(self, Xs):
+        k, d = self.centroids.shape
+        labels = nearest(self.centroids, Xs)
+        n = np.bincount(labels, minlength=k).astype(np.float64)
+        hit = n > 0
+        if not hit.any(): return
+        sums = np.stack([np.bincount(labels, weights=Xs[:, j], minlength=k) for j in range(d)], axis=1)
+        self.counts += n
+        lr = (n[hit] / self.counts[hit])[:, None]
+        self.centroids[hit] = (1 - lr) * self.centroids[hit] + lr * (sums[hit] / n[hit, None])
+
+    def partial_fit(self, X):
+        before = self.centroids.copy()
+        Xs = scale(self.model, X)
+        Xs = Xs[np.isfinite(Xs).all(1)]
+        for i in range(0, len(Xs), self.batch_size):
+            self._step(Xs[i:i + self.batch_size])
+        self.updates += 1
+        drift = np.linalg.norm(self.centroids - before, axis=1)
+        return {"update": self.updates, "rows": int(len(Xs)), "drift": drift.round(6).tolist(),
+                "max_drift": float(drift.max()) if len(drift) else 0.0}
+
+    def fit_chunks(self, chunks, features=None):
+        features = features or self.model["meta"]["features"]
+        for df in chunks:
+            yield self.partial_fit(df[features].to_numpy(dtype=np.float64))
+
+    def to_model(self):
+        model = dict(self.model, centroids=self.centroids.copy())
+        model["meta"] = dict(self.model["meta"], counts=self.counts.round(3).tolist(), updates=self.updates,
+                             updated_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        return model
+
+    def save(self, path=MODEL_PATH):
+        return save_model(self.to_model(), path)
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    # python cluster_online.py <snapshot.csv|.parquet> [...]  — updates coins_cluster_model.npz in place
+    paths = sys.argv[1:] or ["coingecko_api.csv"]
+    online = OnlineClusterer.from_artifact(MODEL_PATH)
+    t = time.perf_counter()
+    for report in online.fit_chunks(iter_chunks(paths)):
+        print(f"  update {report['update']}: {report['rows']} rows, max drift {report['max_drift']:.4f} → {report['drift']}")
+    online.save(MODEL_PATH)
+    print(f" online → {len(paths)} file(s) in {time.perf_counter() - t:.2f}s, saved {MODEL_PATH}")
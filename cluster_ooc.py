@@ -0,0 +1,142 @@
+import os, sys, glob, time, numpy as np, pandas as pd
+from cluster_model import FEATURES, MODEL_FORMAT, MODEL_PATH, save_model, nearest, predict_frame
+from cluster_online import CHUNK_ROWS, BATCH_SIZE, OnlineClusterer, iter_chunks
+
+# ---------- Shared config ----------
+SAMPLE_ROWS = 20_000     # reservoir used only to seed the centroids
+EPOCHS = 2
+OUT_NAME = "coins_clustered_ooc.csv"
+
+# ======================= Streaming statistics =======================
+class StreamingScaler:
+    # StandardScaler fitted one chunk at a time: per-chunk count/mean/co-moment are
+    # merged with Chan et al.'s pairwise update, which stays numerically stable where
+    # the naive sum / sum-of-squares cancels. The full co-moment matrix also gives
+    # the correlation matrix, i.e. the PCA of the scaled data, in the same pass.
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.comoment = np.zeros((n_features, n_features))
+
+    def partial_fit(self, X):
+        X = X[np.isfinite(X).all(1)]
+        nb = len(X)
+        if not nb: return self
+        mb = X.mean(0); D = X - mb
+        delta, n = mb - self.mean, self.n + nb
+        self.comoment += D.T @ D + np.outer(delta, delta) * (self.n * nb / n)
+        self.mean += delta * (nb / n)
+        self.n = n
+        return self
+
+    @property
+    def scale(self):
+        sd = np.sqrt(np.diag(self.comoment) / max(self.n, 1)); sd[sd == 0] = 1.0
+        return sd
+
+    def pca(self, n_components=2):
+        # Covariance of the standardized data; eigenvectors sorted by variance
+        s = self.scale
+        cov = self.comoment / max(self.n - 1, 1) / np.outer(s, s)
+        vals, vecs = np.linalg.eigh(cov)
+        order = np.argsort(vals)[::-1][:n_components]
+        comps = vecs[:, order].T
+        comps *= np.where(comps[np.arange(len(comps)), np.abs(comps).argmax(1)] < 0, -1, 1)[:, None]   # sklearn's sign rule
+        return np.zeros(len(s)), comps
+
+class Reservoir:
+    # Uniform sample of at most `size` rows over the whole stream: every row draws a
+    # random key and the `size` smallest keys survive, chunk by chunk.
+    def __init__(self, size=SAMPLE_ROWS, seed=42):
+        self.size, self.rng = size, np.random.default_rng(seed)
+        self.keys, self.rows = np.empty(0), None
+
+    def add(self, X):
+        X = X[np.isfinite(X).all(1)]
+        keys = np.concatenate([self.keys, self.rng.random(len(X))])
+        rows = X if self.rows is None else np.vstack([self.rows, X])
+        keep = np.argsort(keys)[:self.size]
+        self.keys, self.rows = keys[keep], rows[keep]
+
+# ======================= Pipeline =======================
+def fit_out_of_core(paths, n_clusters=5, features=FEATURES, chunk_rows=CHUNK_ROWS, epochs=EPOCHS,
+                    batch_size=BATCH_SIZE, sample_rows=SAMPLE_ROWS, random_state=42):
+    # Pass 1: scaler + PCA + seed sample. Passes 2..: mini-batch K-Means. Only one
+    # chunk (plus the fixed-size sample) is ever in memory.
+    from sklearn.cluster import KMeans
+    scaler, sample = StreamingScaler(len(features)), Reservoir(sample_rows, random_state)
+    for df in iter_chunks(paths, chunk_rows, features):
+        X = df[features].to_numpy(dtype=np.float64)
+        scaler.partial_fit(X); sample.add(X)
+    if scaler.n < n_clusters: raise ValueError(f"only {scaler.n} usable rows for {n_clusters} clusters")
+    Ss = (sample.rows - scaler.mean) / scaler.scale
+    seed = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=3).fit(Ss)
+    pca_mean, pca_components = scaler.pca()
+    model = {
+        "mean": scaler.mean.copy(), "scale": scaler.scale, "centroids": seed.cluster_centers_,
+        "pca_mean": pca_mean, "pca_components": pca_components,
+        "meta": {"format": MODEL_FORMAT, "features": list(features), "n_clusters": n_clusters,
+                 "random_state": random_state, "n_train": int(scaler.n), "source": "out-of-core",
+                 # the seed fit counts as having seen the sample
+                 "counts": np.bincount(seed.labels_, minlength=n_clusters).tolist()},
+    }
+    online = OnlineClusterer(model, batch_size=batch_size)
+    for epoch in range(epochs):
+        for report in online.fit_chunks(iter_chunks(paths, chunk_rows, features), features): pass
+        print(f"  epoch {epoch + 1}: {report['update']} updates, last max drift {report['max_drift']:.4f}")
+    return online.to_model()
+
+class CsvSink:
+    # Appends labelled chunks to one CSV; the header is written with the first chunk
+    def __init__(self, path):
+        self.path, self.rows = path, 0
+
+    def write(self, df):
+        df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+class ParquetSink:
+    def __init__(self, path):
+        self.path, self.rows, self.writer = path, 0, None
+
+    def write(self, df):
+        import pyarrow as pa, pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None: self.writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self.writer.write_table(table.cast(self.writer.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None: self.writer.close()
+
+def assign_out_of_core(model, paths, sink, chunk_rows=CHUNK_ROWS):
+    # Labels (and PC1/PC2) chunk by chunk into `sink`; returns counts and inertia
+    k = len(model["centroids"])
+    counts, inertia = np.zeros(k + 1, dtype=np.int64), 0.0
+    for df in iter_chunks(paths, chunk_rows):
+        out = predict_frame(model, df)
+        out["Cluster"] = out["Cluster"].astype(np.int16)
+        sink.write(out)
+        counts += np.bincount(out["Cluster"].to_numpy() + 1, minlength=k + 1)
+        Xs = (df[model["meta"]["features"]].to_numpy(dtype=np.float64) - model["mean"]) / model["scale"]
+        Xs = Xs[np.isfinite(Xs).all(1)]
+        inertia += float(((Xs - model["centroids"][nearest(model["centroids"], Xs)]) ** 2).sum())
+    if hasattr(sink, "close"): sink.close()
+    return {"rows": int(counts.sum()), "unassigned": int(counts[0]), "counts": counts[1:].tolist(), "inertia": inertia}
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    # python cluster_ooc.py <out.csv|out.parquet> <snapshot files or globs...>
+    out_name = sys.argv[1] if len(sys.argv) > 1 else OUT_NAME
+    patterns = sys.argv[2:] or ["coingecko_*.csv"]
+    paths = sorted({p for pat in patterns for p in (glob.glob(pat) or [pat])})
+    t = time.perf_counter()
+    model = fit_out_of_core(paths)
+    if os.path.exists(out_name): os.remove(out_name)
+    sink = ParquetSink(out_name) if out_name.endswith((".parquet", ".pq")) else CsvSink(out_name)
+    stats = assign_out_of_core(model, paths, sink)
+    model["meta"].update(counts=stats["counts"], inertia=stats["inertia"], fitted_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    save_model(model, MODEL_PATH)
+    print(pd.Series(stats["counts"], name="coins").rename_axis("Cluster").to_string())
+    print(f" out-of-core → {stats['rows']} rows from {len(paths)} file(s) in {time.perf_counter() - t:.1f}s "
+          f"({stats['unassigned']} unassigned), labels → {out_name}, model → {MODEL_PATH}")
@@ -0,0 +1,112 @@
+import os, sys, json, html, subprocess, tempfile, numpy as np, pandas as pd
+
+# ---------- Shared config ----------
+REPORT_NAME = "cluster_report"
+STAT_COLUMNS = ["Price", "Change_24h", "Change_7d", "Market_Cap"]
+SAMPLE_COLUMNS = ["Name", "Change_24h", "Change_7d", "Market_Cap"]
+FIGURES = {"comparison": "cluster_comparison.png", "combined": "cluster_combined.png"}
+
+# ======================= Statistics =======================
+def cluster_stats(df, columns=STAT_COLUMNS, names=False):
+    # Every per-cluster number in one groupby pass (no per-cluster boolean masks)
+    aggs = {"coins": ("Cluster", "size"), **{f"{c}_mean": (c, "mean") for c in columns if c in df.columns}}
+    if names:
+        df = df.assign(Name=df["Name"].astype(object))    # list-agg over a categorical would re-encode
+        aggs["names"] = ("Name", list)
+    return df.groupby("Cluster", sort=True).agg(**aggs)
+
+def cluster_samples(df, n=5, columns=SAMPLE_COLUMNS):
+    return df.groupby("Cluster", sort=True).head(n).sort_values("Cluster", kind="stable")[["Cluster"] + columns]
+
+def format_stats(stats):
+    lines = []
+    for cluster, s in zip(stats.index, stats.itertuples(index=False)):
+        head = f"\nCluster {cluster}: {s.names}" if "names" in stats.columns else f"\nCluster {cluster} ({s.coins} coins):"
+        lines += [head, f"  Price: ${s.Price_mean:.2f} (avg)", f"  24h Change: {s.Change_24h_mean:.2f}% (avg)",
+                  f"  7d Change: {s.Change_7d_mean:.2f}% (avg)", f"  Market Cap: ${s.Market_Cap_mean:,.0f} (avg)"]
+    return "\n".join(lines)
+
+# ======================= Figures =======================
+def plot_data(train_df, test_df):
+    return {
+        "train_pc": train_df[["PC1", "PC2"]].to_numpy(np.float64), "train_cluster": train_df["Cluster"].to_numpy(np.int64),
+        "test_pc": test_df[["PC1", "PC2"]].to_numpy(np.float64), "test_cluster": test_df["Cluster"].to_numpy(np.int64),
+        "test_names": test_df["Name"].astype(str).to_numpy(dtype=str),
+    }
+
+def render_figures(data, out_dir="."):
+    # Agg: never opens a window, so this runs under cron/CI without a display
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    (tx, ty), tc = data["train_pc"].T, data["train_cluster"]
+    (sx, sy), sc, names = data["test_pc"].T, data["test_cluster"], data["test_names"]
+    paths = {k: os.path.join(out_dir, v) for k, v in FIGURES.items()}
+
+    fig, (a1, a2) = plt.subplots(1, 2, figsize=(14, 6))
+    pts = a1.scatter(tx, ty, c=tc, cmap="tab10", alpha=0.6, edgecolors="k", linewidth=0.5, s=20)
+    a1.set(xlabel="PC1", ylabel="PC2", title=f"Training Set ({len(tc)} coins)"); fig.colorbar(pts, ax=a1, label="Cluster")
+    pts = a2.scatter(sx, sy, c=sc, cmap="tab10", alpha=0.8, edgecolors="k", linewidth=2, s=200, marker="*")
+    a2.set(xlabel="PC1", ylabel="PC2", title=f"Test Set ({len(sc)} Famous Coins)"); fig.colorbar(pts, ax=a2, label="Cluster")
+    for name, x, y in zip(names, sx, sy): a2.annotate(name, (x, y), fontsize=8, ha="right", alpha=0.7)
+    fig.tight_layout(); fig.savefig(paths["comparison"], dpi=150); plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+    ax.scatter(tx, ty, c=tc, cmap="tab10", alpha=0.3, label="Training coins", s=20)
+    ax.scatter(sx, sy, c=sc, cmap="tab10", alpha=1.0, marker="*", s=300, edgecolors="black", linewidth=2, label="Famous coins")
+    for name, x, y in zip(names, sx, sy): ax.annotate(name, (x, y), fontsize=9, fontweight="bold", ha="right")
+    ax.set(xlabel="PC1", ylabel="PC2", title="Combined View: Training vs Famous Test Coins"); ax.legend()
+    fig.savefig(paths["combined"], dpi=150); plt.close(fig)
+    return paths
+
+def render_in_background(data, out_dir="."):
+    # A separate interpreter (not multiprocessing) so callers need no __main__ guard;
+    # the caller carries on while matplotlib renders. Returns the Popen handle.
+    fd, path = tempfile.mkstemp(suffix=".npz", prefix="cluster_plot_"); os.close(fd)
+    np.savez(path, **data)
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--render", path, out_dir])
+
+# ======================= Report =======================
+def build_report(train_df, test_df, model=None, figures=FIGURES):
+    train_stats = cluster_stats(train_df)
+    test_stats = cluster_stats(test_df, names=True) if len(test_df) else None
+    return {
+        "model": (model or {}).get("meta", {}),
+        "train": {"rows": len(train_df), "clusters": train_stats.reset_index().to_dict(orient="records")},
+        "test": {"rows": len(test_df), "clusters": [] if test_stats is None else test_stats.reset_index().to_dict(orient="records"),
+                 "assignments": dict(zip(test_df["Name"].astype(str), test_df["Cluster"].astype(int).tolist()))},
+        "samples": cluster_samples(train_df).to_dict(orient="records"),
+        "figures": dict(figures) if len(test_df) else {},
+    }
+
+def _table(records):
+    return pd.DataFrame(records).to_html(index=False, float_format=lambda v: f"{v:,.4g}", border=0) if records else "<p>none</p>"
+
+def write_report(report, name=REPORT_NAME):
+    with open(f"{name}.json", "w", encoding="utf-8") as f: json.dump(report, f, indent=2, default=str)
+    imgs = "".join(f'<figure><img src="{html.escape(p)}" width="900"><figcaption>{html.escape(k)}</figcaption></figure>'
+                   for k, p in report["figures"].items())
+    meta = "".join(f"<li>{html.escape(str(k))}: {html.escape(str(v))}</li>" for k, v in report["model"].items())
+    body = (f"<h1>Coin clusters</h1><ul>{meta}</ul>"
+            f"<h2>Training set ({report['train']['rows']} coins)</h2>{_table(report['train']['clusters'])}"
+            f"<h2>Test set ({report['test']['rows']} famous coins)</h2>{_table(report['test']['clusters'])}"
+            f"<h2>Sample coins per cluster</h2>{_table(report['samples'])}{imgs}")
+    with open(f"{name}.html", "w", encoding="utf-8") as f:
+        f.write(f"<!doctype html><html><head><meta charset='utf-8'><title>Coin clusters</title>"
+                f"<style>body{{font-family:sans-serif}}td,th{{padding:2px 8px;text-align:right}}</style></head><body>{body}</body></html>")
+    return f"{name}.json", f"{name}.html"
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--render"]:
+        # python cluster_report.py --render <plot.npz> [out_dir]   (used by render_in_background)
+        with np.load(sys.argv[2]) as npz: data = {k: npz[k] for k in npz.files}
+        os.remove(sys.argv[2])
+        render_figures(data, sys.argv[3] if len(sys.argv) > 3 else ".")
+    else:
+        # python cluster_report.py [train.csv] [test.csv]   → report + figures from saved clustering output
+        train_df = pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else "coins_clustered_train.csv")
+        test_path = sys.argv[2] if len(sys.argv) > 2 else "coins_clustered_test.csv"
+        test_df = pd.read_csv(test_path) if os.path.exists(test_path) else train_df.iloc[:0]
+        if len(test_df): render_figures(plot_data(train_df, test_df))
+        print(" report →", ", ".join(write_report(build_report(train_df, test_df))))
@@ -0,0 +1,97 @@
+import os, sys, json, time, tempfile, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cluster_model import FEATURES
+from output import read_frame
+
+# ---------- Shared config ----------
+K_RANGE = range(2, 11)
+SEEDS = [0, 1, 2, 42]
+SILHOUETTE_SAMPLE = 2000     # silhouette is O(n²); score a fixed random sample
+BOOTSTRAPS = 5
+REPORT_NAME = "cluster_sweep_report"
+
+# ======================= Shared matrix =======================
+def scaled_matrix(df, features=FEATURES):
+    X = df[features].dropna().to_numpy(dtype=np.float64)
+    sd = X.std(axis=0); sd[sd == 0] = 1.0
+    return (X - X.mean(axis=0)) / sd
+
+def to_memmap(X, directory):
+    # Written once; every worker maps the same file read-only, so the matrix is
+    # shared through the page cache instead of pickled into each task.
+    path = os.path.join(directory, "X_scaled.npy")
+    mm = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=X.shape)
+    mm[:] = X; mm.flush(); del mm
+    return path
+
+_X = None
+
+def _init_worker(path):
+    global _X
+    _X = np.load(path, mmap_mode="r")
+
+# ======================= Worker =======================
+def evaluate(k, seed, sample_size=SILHOUETTE_SAMPLE, n_boot=BOOTSTRAPS):
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, adjusted_rand_score
+    X = _X
+    t = time.perf_counter()
+    km = KMeans(n_clusters=k, random_state=seed, n_init=1).fit(X)
+    labels = km.labels_
+    sil = silhouette_score(X, labels, sample_size=min(sample_size, len(X)), random_state=seed)
+    # Stability: refit on bootstrap resamples and compare their labelling of the full set
+    rng = np.random.default_rng(seed)
+    aris = []
+    for _ in range(n_boot):
+        idx = rng.integers(0, len(X), len(X))
+        boot = KMeans(n_clusters=k, random_state=int(rng.integers(1 << 31)), n_init=1).fit(X[idx])
+        aris.append(adjusted_rand_score(labels, boot.predict(X)))
+    return {"k": k, "seed": seed, "inertia": float(km.inertia_), "silhouette": float(sil),
+            "stability": float(np.mean(aris)) if aris else float("nan"), "seconds": time.perf_counter() - t}
+
+# ======================= Sweep =======================
+def sweep(X, k_range=K_RANGE, seeds=SEEDS, max_workers=None, sample_size=SILHOUETTE_SAMPLE, n_boot=BOOTSTRAPS):
+    with tempfile.TemporaryDirectory(prefix="cluster_sweep_") as tmp:
+        path = to_memmap(np.ascontiguousarray(X, dtype=np.float64), tmp)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(path,)) as pool:
+            futures = [pool.submit(evaluate, k, s, sample_size, n_boot) for k in k_range for s in seeds]
+            runs = []
+            for f in as_completed(futures):
+                r = f.result(); runs.append(r)
+                print(f"  k={r['k']:<2} seed={r['seed']:<3} silhouette={r['silhouette']:.3f} stability={r['stability']:.3f} ({r['seconds']:.1f}s)")
+    return pd.DataFrame(runs).sort_values(["k", "seed"]).reset_index(drop=True)
+
+def rank_report(runs):
+    rep = runs.groupby("k").agg(
+        silhouette_mean=("silhouette", "mean"), silhouette_std=("silhouette", "std"),
+        inertia_mean=("inertia", "mean"), stability_mean=("stability", "mean"),
+        stability_min=("stability", "min"), seconds=("seconds", "sum"),
+    )
+    # Good k = well separated AND reproducible under resampling
+    rep["score"] = rep["silhouette_mean"] * rep["stability_mean"]
+    rep = rep.sort_values("score", ascending=False).reset_index()
+    rep.insert(0, "rank", range(1, len(rep) + 1))
+    return rep
+
+def save_report(report, runs, name=REPORT_NAME):
+    report.to_csv(f"{name}.csv", index=False)
+    with open(f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump({"ranked": report.to_dict(orient="records"), "runs": runs.to_dict(orient="records")}, f, indent=2)
+    return f"{name}.csv", f"{name}.json"
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    # python cluster_sweep.py [snapshot.csv] [k_min] [k_max] [workers]
+    args = sys.argv[1:]
+    src = args[0] if args else "coingecko_bs4.csv"
+    k_range = range(int(args[1]) if len(args) > 1 else K_RANGE.start, (int(args[2]) if len(args) > 2 else K_RANGE.stop - 1) + 1)
+    workers = int(args[3]) if len(args) > 3 else None
+
+    X = scaled_matrix(read_frame(src))
+    print(f"Sweeping k={k_range.start}..{k_range.stop - 1} × {len(SEEDS)} seeds on {len(X)} rows…")
+    t = time.perf_counter()
+    runs = sweep(X, k_range, SEEDS, workers)
+    report = rank_report(runs)
+    csv_name, json_name = save_report(report, runs)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f" sweep → {len(runs)} fits in {time.perf_counter() - t:.1f}s, saved {csv_name} and {json_name}")
@@ -1,14 +1,16 @@
 import pandas as pd
+from cluster_report import cluster_stats, cluster_samples
 
 df = pd.read_csv("coins_clustered_full.csv")
 
-# Count coins per cluster
-print(df['Cluster'].value_counts())
+# Count coins per cluster (one groupby pass for all clusters)
+stats = cluster_stats(df)
+print(stats["coins"])
 
 # Find representative coins of each cluster
-for c in sorted(df['Cluster'].unique()):
+for c, sample in cluster_samples(df).groupby("Cluster", sort=True):
     print(f"\nCluster {c} sample coins:")
-    print(df[df['Cluster'] == c][['Name', 'Change_24h', 'Change_7d', 'Market_Cap']].head(5))
+    print(sample.drop(columns="Cluster"))
 
 print("Total coins:", len(df))
-print(df['Cluster'].value_counts())
+print(stats[[c for c in stats.columns if c.endswith("_mean")]])
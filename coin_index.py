@@ -0,0 +1,155 @@
+import os, re, json, numpy as np, pandas as pd
+
+# ---------- Shared config ----------
+INDEX_PATH = "coin_index.json"
+MAX_SYMBOL_LEN = 12
+
+def slug(name):
+    # CoinGecko-id style: "Shiba Inu" → "shiba-inu", "Bitcoin Cash" → "bitcoin-cash"
+    return re.sub(r"[^a-z0-9]+", "-", str(name or "").lower()).strip("-")
+
+def raw_key(text):
+    # Provisional identity of a glued name: bs4 writes "Shiba InuSHIB", Selenium "Shiba Inu SHIB"
+    return re.sub(r"\s+", "", str(text or ""))
+
+def split_name_symbol(text, known_symbols=(), known_identities=()):
+    # The BS4/Selenium scrapes glue the symbol onto the name ("BitcoinBTC",
+    # "Bitcoin BTC", "Shiba InuSHIB") and leave Symbol empty. Undo that, most
+    # reliable rule first.
+    text = (text or "").strip()
+    known = [(text[:-n].rstrip(), text[-n:]) for n in range(min(MAX_SYMBOL_LEN, len(text) - 1), 0, -1)
+             if text[-n:] in known_symbols]
+    for name, symbol in known:
+        if (symbol, slug(name)) in known_identities: return name, symbol     # seen before
+    half = len(text) // 2
+    if len(text) % 2 == 0 and half and text[:half] == text[half:]:
+        return text[:half], text[half:]                                     # "BNBBNB", "USDCUSDC"
+    m = re.match(r"^(.*\S)\s+([A-Z0-9._-]{1,%d})$" % MAX_SYMBOL_LEN, text)
+    if m: return m.group(1), m.group(2)                                     # "Bitcoin BTC"
+    for name, symbol in known:
+        if not name[-1:].isupper(): return name, symbol                     # "Shiba InuSHIB"
+    m = re.match(r"^(.*[a-z)\]])([A-Z0-9._-]{1,%d})$" % MAX_SYMBOL_LEN, text)
+    if m: return m.group(1), m.group(2)                                     # "BitcoinBTC", "Figure HelocFIGR_HELOC"
+    if known: return known[0]                                               # "TRONTRX"
+    return text, ""
+
+# ======================= Index =======================
+class CoinIndex:
+    # (symbol, slug) → stable int key. Keys are handed out in first-seen order and
+    # persisted, so the same coin gets the same key in every snapshot and source.
+    # A glued name whose split no source has confirmed yet is keyed provisionally on
+    # the raw text minus spaces (by_raw, never matched by lookup); it is promoted in place once
+    # a source reports that name + symbol, so it stays stable across snapshots.
+    def __init__(self, records=None):
+        self.records = []                        # key → {"symbol", "name", "slug", "id", "explicit"[, "raw", "provisional"]}
+        self.by_identity, self.by_slug, self.by_id, self.by_symbol, self.by_raw = {}, {}, {}, {}, {}
+        # Only symbols a source actually reported (not ones we split off a name) guide splitting
+        self.known_symbols, self.known_identities = set(), set()
+        for r in records or []: self._register(r)
+
+    def __len__(self): return len(self.records)
+
+    def _register(self, rec):
+        key = len(self.records)
+        self.records.append(rec)
+        if rec.get("raw"): self.by_raw.setdefault(raw_key(rec["raw"]), key)
+        if not rec.get("provisional"): self._index(key, rec)
+        return key
+
+    def _index(self, key, rec):
+        self.by_identity.setdefault((rec["symbol"], rec["slug"]), key)
+        self.by_slug.setdefault(rec["slug"], key)
+        self.by_symbol.setdefault(rec["symbol"], key)
+        if rec.get("id"): self.by_id.setdefault(rec["id"], key)
+        if rec.get("explicit", True): self._mark_explicit(rec)
+
+    def _mark_explicit(self, rec):
+        rec["explicit"] = True
+        if rec["symbol"]:
+            self.known_symbols.add(rec["symbol"]); self.known_identities.add((rec["symbol"], rec["slug"]))
+
+    def add(self, symbol, name, coin_id=None, explicit=True):
+        # The CoinGecko id wins when present: two coins can share a name and symbol
+        # (two "ARK"/"ARK" in one snapshot) but never an id
+        symbol, s = (symbol or "").upper(), slug(name)
+        key = self.by_id.get(coin_id) if coin_id else None
+        if key is None:
+            key = self.by_identity.get((symbol, s))
+            if key is not None and coin_id and self.records[key].get("id") not in (None, coin_id): key = None
+        if key is None and explicit:
+            key = self.by_raw.get(raw_key(name + symbol))
+            if key is not None and not self.records[key].get("provisional"): key = None
+            if key is not None:                                               # confirms a provisional key
+                self.records[key].update(symbol=symbol, name=name, slug=s, id=coin_id or None, explicit=True, provisional=False)
+                self._index(key, self.records[key]); return key
+        if key is None:
+            return self._register({"symbol": symbol, "name": name, "slug": s, "id": coin_id or None, "explicit": explicit})
+        rec = self.records[key]
+        if coin_id and not rec.get("id"):
+            rec["id"] = coin_id; self.by_id[coin_id] = key
+        if explicit and not rec.get("explicit"): self._mark_explicit(rec)
+        return key
+
+    def lookup(self, symbol=None, name=None, coin_id=None):
+        if coin_id and coin_id in self.by_id: return self.by_id[coin_id]
+        symbol, s = (symbol or "").upper(), slug(name) if name else ""
+        if symbol and s and (symbol, s) in self.by_identity: return self.by_identity[(symbol, s)]
+        if s and s in self.by_slug: return self.by_slug[s]
+        if s and s in self.by_id: return self.by_id[s]
+        if symbol: return self.by_symbol.get(symbol)
+        return None
+
+    # ---------- frames ----------
+    def confirmed(self, symbol, name):
+        # Key of a split that matches an identity some source reported, else None
+        ident = ((symbol or "").upper(), slug(name))
+        return self.by_identity.get(ident) if ident in self.known_identities else None
+
+    def provisional(self, keys):
+        # Bool mask: which keys are still only a raw glued name
+        return np.array([k >= 0 and bool(self.records[k].get("provisional")) for k in keys], dtype=bool)
+
+    def canonical(self, df, name_col="Name", symbol_col="Symbol", id_col="Id", add=True):
+        # Returns a copy with Coin_Name/Coin_Symbol (split where a scrape glued them
+        # together; Name/Symbol stay as scraped) and an integer Coin_Key column. A split
+        # is only a guess until a source reports that symbol for that name, so rows with
+        # an unconfirmed split get a provisional key on their raw name instead (-1 only
+        # with add=False and no such key yet). Work is done once per distinct (name, symbol, id).
+        out = df.copy()
+        ids = out[id_col].astype("string").fillna("") if id_col in out.columns else pd.Series("", index=out.index)
+        sym = out[symbol_col].astype("string").fillna("") if symbol_col in out.columns else pd.Series("", index=out.index)
+        triples = pd.MultiIndex.from_arrays([out[name_col].astype("string").fillna(""), sym, ids])
+        codes, uniques = pd.factorize(triples)
+        names, symbols, keys = [], [], np.empty(len(uniques), dtype=np.int64)
+        for j, (name, symbol, coin_id) in enumerate(uniques):
+            explicit, raw = bool(symbol), name
+            if not explicit: name, symbol = split_name_symbol(name, self.known_symbols, self.known_identities)
+            if explicit or coin_id: key = self.add(symbol, name, coin_id, explicit) if add else self.lookup(symbol, name, coin_id)
+            else:
+                key = self.confirmed(symbol, name)
+                if key is None: key = self.by_raw.get(raw_key(raw))
+                if key is None and add and raw:
+                    key = self._register({"symbol": "", "name": raw, "slug": slug(raw), "id": None,
+                                          "explicit": False, "raw": raw, "provisional": True})
+            names.append(name); symbols.append(symbol.upper()); keys[j] = -1 if key is None else key
+        out["Coin_Name"] = pd.array(np.array(names, dtype=object)[codes], dtype="string")
+        out["Coin_Symbol"] = pd.array(np.array(symbols, dtype=object)[codes], dtype="string")
+        out["Coin_Key"] = keys[codes]
+        return out
+
+    def keys_for(self, coins):
+        # coins: iterable of (name, symbol) pairs → keys that are present
+        keys = (self.lookup(symbol, name) for name, symbol in coins)
+        return [k for k in keys if k is not None]
+
+    # ---------- persistence ----------
+    def save(self, path=INDEX_PATH):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self.records, f)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        if not os.path.exists(path): return cls()
+        with open(path, encoding="utf-8") as f: return cls(json.load(f))
@@ -0,0 +1,145 @@
+import os, sys, json, numpy as np, pandas as pd
+from datetime import datetime, timezone
+from normalize import TARGET_COLUMNS, typed_frame
+from snapshot_store import as_utc
+
+# ---------- Shared config ----------
+DELTA_DIR = "deltas"
+# Columns hashed and shipped together; an update carries only the groups that changed.
+# Name/Symbol form the row key, so a renamed coin is a removal plus an insert.
+GROUPS = {
+    "rank": ["Rank"],
+    "market": ["Price", "Change_1h", "Change_24h", "Change_7d", "Change_30d", "Volume_24h", "Market_Cap"],
+    "supply": ["Circulating_Supply", "Total_Supply"],
+}
+GROUP_BITS = {g: 1 << n for n, g in enumerate(GROUPS)}
+FULL_EVERY = 100        # write a full snapshot every N runs so replays never walk the whole log
+
+# ======================= Diffing =======================
+def row_keys(df):
+    # The CoinGecko id where the source has one, else Name+Symbol exactly as reported;
+    # coins sharing both (two "ARK"/"ARK") get "#2", "#3"… in the order given (rank order)
+    base = df["Name"].astype("string").fillna("") + "\x1f" + df["Symbol"].astype("string").fillna("")
+    ids = df["Id"].astype("string").fillna("") if "Id" in df.columns else pd.Series("", index=df.index, dtype="string")
+    base = base.where(ids == "", "id:" + ids)
+    n = base.groupby(base, sort=False).cumcount()
+    return base.where(n == 0, base + "#" + (n + 1).astype("string"))
+
+def keyed(df):
+    out = typed_frame(df).sort_values("Rank", kind="stable", na_position="last")
+    out.insert(0, "Key", row_keys(out))
+    dup = out["Key"].duplicated()
+    if dup.any():       # only a repeated CoinGecko id can collide; never drop a coin silently
+        raise ValueError(f"duplicate coin ids in snapshot: {', '.join(out.loc[dup, 'Id'].astype(str).unique()[:5])}")
+    return out.set_index("Key")
+
+def group_hashes(df):
+    return pd.DataFrame({g: pd.util.hash_pandas_object(df[cols], index=False).to_numpy() for g, cols in GROUPS.items()}, index=df.index)
+
+def diff(old, new):
+    # old/new: keyed frames → delta frame [Key, op, mask, *TARGET_COLUMNS]; op is I/U/D and
+    # for updates only the columns of the groups flagged in `mask` are filled in
+    inserted = new.index.difference(old.index)
+    deleted = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+    changed = group_hashes(new.loc[common]) != group_hashes(old.loc[common])
+    mask = sum(changed[g].to_numpy().astype(np.uint8) * bit for g, bit in GROUP_BITS.items()) if len(common) else np.zeros(0, np.uint8)
+    mask = pd.Series(mask, index=common, dtype=np.uint8)
+    upd = new.loc[mask[mask > 0].index].copy()
+    for g, cols in GROUPS.items():
+        upd.loc[(mask.loc[upd.index] & GROUP_BITS[g]).to_numpy() == 0, cols] = np.nan
+    parts = [
+        new.loc[inserted].assign(op="I", mask=sum(GROUP_BITS.values())),
+        upd.assign(op="U", mask=mask.loc[upd.index]),
+        old.loc[deleted].assign(op="D", mask=0),     # last known values, for consumers
+    ]
+    out = pd.concat([p for p in parts if len(p)] or [new.iloc[:0].assign(op="I", mask=0)])
+    out["mask"] = out["mask"].astype(np.uint8)
+    return out.rename_axis("Key").reset_index()[["Key", "op", "mask"] + TARGET_COLUMNS]
+
+def apply(state, delta):
+    # state: keyed frame; delta: frame from diff() → new keyed state
+    delta = delta.set_index("Key")
+    state = state.drop(delta.index[delta["op"] == "D"], errors="ignore")
+    upd = delta[delta["op"] == "U"]
+    for g, cols in GROUPS.items():
+        rows = upd.index[(upd["mask"].to_numpy() & GROUP_BITS[g]) > 0]
+        if len(rows): state.loc[rows, cols] = upd.loc[rows, cols].to_numpy()
+    ins = delta.loc[delta["op"] == "I"].reindex(columns=TARGET_COLUMNS)    # logs written before Id lack it
+    if len(ins): state = pd.concat([state.drop(ins.index, errors="ignore"), ins])
+    return keyed(state.reset_index(drop=True))
+
+def ordered(state):
+    return typed_frame(state.sort_values("Rank", kind="stable", na_position="last").reset_index(drop=True))
+
+# ======================= Log =======================
+class DeltaLog:
+    # <root>/<source>/: NNNNNN.parquet per run holding only inserts/updates/removals,
+    # NNNNNN-full.parquet every FULL_EVERY runs, manifest.jsonl describing each run,
+    # and state.parquet with the latest snapshot to diff the next run against.
+    def __init__(self, root=DELTA_DIR, source="scrape"):
+        self.dir = os.path.join(root, source or "scrape")
+
+    def _path(self, name): return os.path.join(self.dir, name)
+
+    def entries(self):
+        if not os.path.exists(self._path("manifest.jsonl")): return []
+        with open(self._path("manifest.jsonl"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def state(self):
+        if not os.path.exists(self._path("state.parquet")): return keyed(pd.DataFrame())
+        return keyed(pd.read_parquet(self._path("state.parquet")))
+
+    def append(self, df, scrape_time=None):
+        os.makedirs(self.dir, exist_ok=True)
+        t = as_utc(scrape_time or datetime.now(timezone.utc)).floor("s")
+        entries = self.entries()
+        seq = entries[-1]["seq"] + 1 if entries else 1
+        old, new = self.state(), keyed(df)
+        delta = diff(old, new)
+        name = f"{seq:06d}.parquet"
+        delta.to_parquet(self._path(name), index=False, compression="zstd")
+        full = name if seq == 1 else None           # the first delta is all inserts already
+        if seq % FULL_EVERY == 0:
+            full = f"{seq:06d}-full.parquet"
+            diff(keyed(pd.DataFrame()), new).to_parquet(self._path(full), index=False, compression="zstd")
+        ops = delta["op"].value_counts()
+        entry = {"seq": seq, "time": t.isoformat(), "file": name, "full": full, "rows": len(new),
+                 "inserts": int(ops.get("I", 0)), "updates": int(ops.get("U", 0)), "deletes": int(ops.get("D", 0))}
+        tmp = self._path("state.parquet.tmp")
+        ordered(new).to_parquet(tmp, index=False, compression="zstd")
+        os.replace(tmp, self._path("state.parquet"))
+        with open(self._path("manifest.jsonl"), "a", encoding="utf-8") as f: f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def changes(self, since=0):
+        # Delta rows of every run after `since`, for consumers that only reprocess what moved
+        parts = [pd.read_parquet(self._path(e["file"])).assign(seq=e["seq"])
+                 for e in self.entries() if e["seq"] > since]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["Key", "op", "mask"] + TARGET_COLUMNS + ["seq"])
+
+    def replay(self, seq=None, at=None):
+        # Rebuild the snapshot as of run `seq` (or the last run at/before `at`)
+        entries = self.entries()
+        if at is not None: entries = [e for e in entries if pd.Timestamp(e["time"]) <= as_utc(at)]
+        if seq is not None: entries = [e for e in entries if e["seq"] <= seq]
+        if not entries: return ordered(pd.DataFrame())
+        start = max(n for n, e in enumerate(entries) if e["full"])
+        state = apply(keyed(pd.DataFrame()), pd.read_parquet(self._path(entries[start]["full"])))
+        for e in entries[start + 1:]:
+            state = apply(state, pd.read_parquet(self._path(e["file"])))
+        return ordered(state)
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    # python delta_log.py <source> [seq]   → print the log, or write the replayed snapshot
+    source = sys.argv[1] if len(sys.argv) > 1 else "scrape"
+    log = DeltaLog(source=source)
+    if len(sys.argv) > 2:
+        out = f"coingecko_{source}_replay_{int(sys.argv[2]):06d}.csv"
+        log.replay(int(sys.argv[2])).to_csv(out, index=False, encoding="utf-8-sig")
+        print(f" replayed run {sys.argv[2]} → {out}")
+    else:
+        for e in log.entries():
+            print(f"  #{e['seq']:<5} {e['time']}  {e['rows']:>5} rows  +{e['inserts']} ~{e['updates']} -{e['deletes']}{'  (full)' if e['full'] else ''}")
@@ -0,0 +1,128 @@
+import time, atexit, queue, threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+# ---------- Shared config ----------
+POOL_SIZE = 2
+MAX_USES = 20       # recycle a browser after this many checkouts
+POLL_S = 0.5        # how often a blocked checkout rechecks for a slot freed by a discard
+HEADLESS = False
+PAGE_LOAD_STRATEGY = "eager"   # return at DOMContentLoaded; the table is server-rendered
+BLOCK_RESOURCES = True
+# Never needed for the table: fonts, media and trackers (images are off via prefs)
+BLOCKED_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*cloudflareinsights.com*",
+]
+
+@lru_cache(maxsize=1)
+def driver_path():
+    # ChromeDriverManager hits the network/cache on every install(); once per process is enough
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+def chrome_options(headless=HEADLESS, block=BLOCK_RESOURCES):
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument("--disable-gpu")
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if block:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if headless:
+        options.add_argument("--headless=new"); options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("--start-maximized")
+    return options
+
+def block_requests(driver, patterns=BLOCKED_URLS):
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception: pass   # not a Chromium driver; prefs still block images
+
+def new_driver(headless=HEADLESS, block=BLOCK_RESOURCES):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    driver = webdriver.Chrome(service=Service(driver_path()), options=chrome_options(headless, block))
+    if block: block_requests(driver)
+    return driver
+
+def is_healthy(driver):
+    try: return driver.execute_script("return 1") == 1 and bool(driver.window_handles)
+    except Exception: return False
+
+def quit_quietly(driver):
+    try: driver.quit()
+    except Exception: pass
+
+# ======================= Pool =======================
+class DriverPool:
+    def __init__(self, size=POOL_SIZE, headless=HEADLESS, max_uses=MAX_USES):
+        self.size, self.headless, self.max_uses = size, headless, max_uses
+        self.idle = queue.LifoQueue()   # LIFO keeps the warmest browser in use
+        self.uses = {}                  # id(driver) -> checkouts so far
+        self.created = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def _discard(self, driver):
+        with self.lock:
+            self.uses.pop(id(driver), None); self.created -= 1
+        quit_quietly(driver)
+
+    def checkout(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.closed: raise RuntimeError("driver pool is closed")
+            try: driver = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_create = self.created < self.size
+                    if can_create: self.created += 1
+                if can_create:
+                    try: driver = new_driver(self.headless)
+                    except Exception:
+                        with self.lock: self.created -= 1
+                        raise
+                    self.uses[id(driver)] = 0
+                    return driver
+                # A checkin that discards a driver (recycled / unhealthy) frees a slot
+                # without queueing anything, so wait in short polls and recheck `created`
+                wait = POLL_S if deadline is None else min(POLL_S, deadline - time.monotonic())
+                if wait <= 0: raise queue.Empty
+                try: driver = self.idle.get(timeout=wait)
+                except queue.Empty: continue
+            if is_healthy(driver): return driver
+            self._discard(driver)
+
+    def checkin(self, driver):
+        n = self.uses.get(id(driver), 0) + 1
+        if self.closed or n >= self.max_uses or not is_healthy(driver):
+            return self._discard(driver)
+        self.uses[id(driver)] = n
+        self.idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        d = self.checkout(timeout)
+        try: yield d
+        finally: self.checkin(d)
+
+    def close(self):
+        self.closed = True
+        while True:
+            try: self._discard(self.idle.get_nowait())
+            except queue.Empty: break
+
+_shared, _shared_lock = None, threading.Lock()
+
+def get_pool(size=POOL_SIZE, headless=HEADLESS, max_uses=MAX_USES):
+    # One pool per process; asking for more workers grows it
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared.closed:
+            _shared = DriverPool(size, headless, max_uses)
+            atexit.register(_shared.close)
+        _shared.size = max(_shared.size, size)
+        return _shared
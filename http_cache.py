@@ -0,0 +1,116 @@
+import os, json, time, hashlib, threading, requests
+from urllib.parse import urlencode
+
+# ---------- Shared config ----------
+CACHE_DIR = ".http_cache"
+TTL = 300                    # seconds a response is served without asking the server
+MAX_BYTES = 64 * 2**20       # LRU-evict bodies beyond this total size
+
+class CachedResponse:
+    # The subset of requests.Response that the fetchers use
+    def __init__(self, status_code, content, headers=None, url="", from_cache=False):
+        self.status_code, self.content, self.url = status_code, content, url
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.from_cache = from_cache
+
+    @property
+    def text(self): return self.content.decode("utf-8", errors="replace")
+
+    def json(self): return json.loads(self.content)
+
+# ======================= Cache =======================
+class CachedSession:
+    # Fresh entries (< ttl) are served from disk; stale ones are revalidated with
+    # If-None-Match / If-Modified-Since so an unchanged page costs a 304, not a
+    # download. offline=True replays whatever is on disk and never touches the network.
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TTL, max_bytes=MAX_BYTES, offline=False, session=None):
+        self.dir, self.ttl, self.max_bytes, self.offline = cache_dir, ttl, max_bytes, offline
+        self.session = session or requests.Session()
+        self.lock = threading.Lock()
+        self.stats = {"fresh": 0, "revalidated": 0, "downloaded": 0, "offline_miss": 0}
+        os.makedirs(self.dir, exist_ok=True)
+        self.index_path = os.path.join(self.dir, "index.json")
+        try:
+            with open(self.index_path, encoding="utf-8") as f: self.index = json.load(f)
+        except (OSError, ValueError): self.index = {}
+
+    @staticmethod
+    def key(url, params=None):
+        q = urlencode(sorted((k, str(v)) for k, v in (params or {}).items()))
+        return hashlib.sha1(f"{url}?{q}".encode()).hexdigest()
+
+    def _body_path(self, k): return os.path.join(self.dir, k + ".body")
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def _cached(self, k, entry, url):
+        try:
+            with open(self._body_path(k), "rb") as f: body = f.read()
+        except OSError:
+            self.index.pop(k, None); return None
+        entry["accessed"] = time.time()
+        return CachedResponse(200, body, entry.get("headers"), url, from_cache=True)
+
+    def _store(self, k, url, r):
+        with open(self._body_path(k), "wb") as f: f.write(r.content)
+        now = time.time()
+        self.index[k] = {
+            "url": url, "stored": now, "accessed": now, "size": len(r.content),
+            "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"),
+            "headers": {h: r.headers[h] for h in ("Content-Type", "ETag", "Last-Modified") if h in r.headers},
+        }
+        self._evict()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self.index.values())
+        for k, e in sorted(self.index.items(), key=lambda kv: kv[1]["accessed"]):
+            if total <= self.max_bytes: break
+            total -= e["size"]; self.index.pop(k)
+            try: os.remove(self._body_path(k))
+            except OSError: pass
+
+    def get(self, url, params=None, timeout=30, **kwargs):
+        k = self.key(url, params)
+        with self.lock:
+            entry = self.index.get(k)
+            if entry and not os.path.exists(self._body_path(k)):
+                # Body evicted by another process sharing the dir (or deleted): a 304
+                # would have nothing to serve, so forget the validators too
+                self.index.pop(k, None); entry = None
+            if entry and (self.offline or time.time() - entry["stored"] < self.ttl):
+                r = self._cached(k, entry, url)
+                if r is not None:
+                    self.stats["fresh"] += 1; self._save_index(); return r
+            if self.offline:
+                self.stats["offline_miss"] += 1
+                return CachedResponse(504, b"offline: not in cache", url=url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
+        r = self.session.get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+        with self.lock:
+            if r.status_code == 304 and entry:
+                entry["stored"] = time.time()
+                if r.headers.get("ETag"): entry["etag"] = r.headers["ETag"]
+                cached = self._cached(k, entry, url)
+                if cached is not None:
+                    self.stats["revalidated"] += 1; self._save_index(); return cached
+        if r.status_code == 304:
+            # The body vanished between the check and the 304: ask again, unconditionally
+            headers.pop("If-None-Match", None); headers.pop("If-Modified-Since", None)
+            r = self.session.get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+        with self.lock:
+            if r.status_code == 200:
+                self._store(k, url, r); self.stats["downloaded"] += 1; self._save_index()
+        return r
+
+    def clear(self):
+        with self.lock:
+            for k in list(self.index):
+                try: os.remove(self._body_path(k))
+                except OSError: pass
+            self.index = {}; self._save_index()
@@ -0,0 +1,120 @@
+import os, json, time, random, shutil, hashlib, threading, pandas as pd
+import metrics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ---------- Shared config ----------
+JOB_DIR = ".jobs"
+MAX_ATTEMPTS = 3        # per shard, per invocation; a rerun gets a fresh set
+MAX_AGE_S = 6 * 3600    # older checkpoints are prices from another moment: start over instead of merging
+
+class JobIncomplete(RuntimeError):
+    pass
+
+def job_id(name, params):
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:10]
+    return f"{name}-{digest}"
+
+# ======================= Job =======================
+class Job:
+    # A scrape split into shards (API pages, rank ranges). Each finished shard is
+    # written to <root>/<id>/shard-<n>.parquet before it is marked done in job.json,
+    # so a crash loses at most the shards in flight. The id comes from the job's
+    # parameters: rerunning the same command resumes and retries only what is missing.
+    def __init__(self, name, shards, params=None, root=JOB_DIR, max_age=MAX_AGE_S):
+        self.id = job_id(name, params or {})
+        self.dir = os.path.join(root, self.id)
+        self.lock = threading.Lock()
+        state = self._load()
+        if state and max_age is not None and time.time() - state["created"] > max_age:
+            print(f"  job {self.id}: checkpoints are {(time.time() - state['created']) / 3600:.1f}h old "
+                  f"(max {max_age / 3600:g}h); discarding them and starting over")
+            self.clear(); state = None
+        self.state = state or {"name": name, "params": params or {}, "created": time.time(),
+                                      "shards": {str(s): {"status": "pending", "attempts": 0, "rows": 0, "error": None} for s in shards}}
+        self.shards = list(shards)
+
+    def _path(self, name): return os.path.join(self.dir, name)
+
+    def _load(self):
+        if not os.path.exists(self._path("job.json")): return None
+        with open(self._path("job.json"), encoding="utf-8") as f: return json.load(f)
+
+    def _save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = self._path("job.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(self.state, f, indent=2)
+        os.replace(tmp, self._path("job.json"))
+
+    def status(self, shard): return self.state["shards"][str(shard)]["status"]
+    def pending(self): return [s for s in self.shards if self.status(s) != "done"]
+    def done(self): return [s for s in self.shards if self.status(s) == "done"]
+
+    def checkpoint(self, shard, df):
+        os.makedirs(self.dir, exist_ok=True)
+        path, tmp = self._path(f"shard-{shard}.parquet"), self._path(f"shard-{shard}.parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        with self.lock:
+            rec = self.state["shards"][str(shard)]
+            rec.update(status="done", rows=len(df), error=None, attempts=rec["attempts"] + 1)
+            self._save()
+
+    def fail(self, shard, err):
+        with self.lock:
+            rec = self.state["shards"][str(shard)]
+            rec.update(status="failed", error=f"{type(err).__name__}: {err}"[:300], attempts=rec["attempts"] + 1)
+            self._save()
+
+    # ---------- running ----------
+    def run(self, fn, max_workers=1, max_attempts=MAX_ATTEMPTS, rate=None):
+        # fn(shard) → DataFrame. Rounds retry only the failed shards, with full-jitter
+        # backoff (or the exception's retry_after, e.g. a 429) between rounds.
+        resumed = self.done()
+        if resumed: print(f"  job {self.id}: resuming, {len(resumed)}/{len(self.shards)} shards already checkpointed")
+        self._save()
+        wait = 0.0
+        for attempt in range(max_attempts):
+            todo = self.pending()
+            if not todo: break
+            if attempt:
+                wait = max(wait, random.uniform(0, min(30.0, 2 ** attempt)))
+                metrics.retry(self.state["name"], "shard", len(todo), job=self.id, shards=todo, delay=round(wait, 1))
+                print(f"  job {self.id}: retrying {len(todo)} failed shard(s) in {wait:.1f}s"); time.sleep(wait)
+            wait = 0.0
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as ex:
+                futures = {}
+                for n, s in enumerate(todo):
+                    if rate and n: time.sleep(1.0 / rate)      # spread shard starts, e.g. API rate limits
+                    futures[ex.submit(fn, s)] = s
+                for f in as_completed(futures):
+                    s = futures[f]
+                    try: df = f.result()
+                    except Exception as e:
+                        self.fail(s, e); wait = max(wait, float(getattr(e, "retry_after", 0) or 0))
+                        metrics.SHARD_FAILURES.inc(backend=self.state["name"])
+                        metrics.event("shard_failed", job=self.id, shard=s, error=repr(e))
+                        print(f"  shard {s} failed: {e!r}")
+                    else:
+                        self.checkpoint(s, df); print(f"  shard {s} → {len(df)} rows (checkpointed)")
+        missing = self.pending()
+        if missing:
+            raise JobIncomplete(f"job {self.id}: {len(missing)}/{len(self.shards)} shard(s) failed ({', '.join(map(str, missing))}); "
+                                f"checkpoints kept in {self.dir}, rerun the same command to resume")
+        return self
+
+    def frames(self):
+        return [pd.read_parquet(self._path(f"shard-{s}.parquet")) for s in self.done()]
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def run_job(name, shards, fn, params=None, combine=None, max_workers=1, rate=None, root=JOB_DIR, keep=False, max_age=MAX_AGE_S):
+    # Runs (or resumes) the job and returns combine(frames); checkpoints are removed
+    # once the combined result exists unless keep=True. Checkpoints older than
+    # max_age seconds are never merged into a new snapshot.
+    job = Job(name, shards, params, root, max_age).run(fn, max_workers, rate=rate)
+    frames = [f for f in job.frames() if len(f)]
+    combine = combine or (lambda fs: pd.concat(fs, ignore_index=True))
+    result = combine(frames) if frames else pd.DataFrame()
+    if not keep: job.clear()
+    return result
@@ -0,0 +1,174 @@
+import os, sys, json, time, bisect, threading
+from contextlib import contextmanager
+
+# ---------- Shared config ----------
+# Both can also be set per run (scrape.py --metrics-log / --metrics-port); nothing is
+# served on import — the endpoint starts only through configure() / serve()
+LOG_PATH = os.environ.get("METRICS_LOG")            # JSON-lines event log; unset = no log
+PORT = int(os.environ.get("METRICS_PORT") or 0)     # Prometheus text on :PORT/metrics; 0 = off
+HOST = os.environ.get("METRICS_HOST", "127.0.0.1")  # bind address; set 0.0.0.0 to expose it
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# ======================= Metrics =======================
+class Metric:
+    # One named series per label set; label values are kept in a sorted tuple key
+    kind = ""
+
+    def __init__(self, name, help=""):
+        self.name, self.help = name, help
+        self.values = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels): return tuple(sorted(labels.items()))
+
+class Counter(Metric):
+    kind = "counter"
+    def inc(self, n=1, **labels):
+        with self.lock: k = self._key(labels); self.values[k] = self.values.get(k, 0) + n
+
+class Gauge(Metric):
+    kind = "gauge"
+    def set(self, v, **labels):
+        with self.lock: self.values[self._key(labels)] = v
+
+class Histogram(Metric):
+    kind = "histogram"
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, v, **labels):
+        with self.lock:
+            k = self._key(labels)
+            h = self.values.setdefault(k, {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0})
+            h["counts"][bisect.bisect_left(self.buckets, v)] += 1
+            h["sum"] += v; h["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try: yield
+        finally: self.observe(time.perf_counter() - t, **labels)
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self.lock:
+            if name not in self.metrics: self.metrics[name] = cls(name, help, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name, help=""): return self._get(Counter, name, help)
+    def gauge(self, name, help=""): return self._get(Gauge, name, help)
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS): return self._get(Histogram, name, help, buckets=buckets)
+
+    def snapshot(self):
+        # {name: {"type", "series": [{"labels", "value" | histogram fields}]}}, JSON-ready
+        out = {}
+        for name, m in list(self.metrics.items()):
+            with m.lock:
+                series = [{"labels": dict(k), **(v if isinstance(v, dict) else {"value": v})} for k, v in m.values.items()]
+            if not series: continue
+            if m.kind == "histogram":
+                for s in series: s["counts"] = list(s["counts"]); s["buckets"] = list(m.buckets)
+            out[name] = {"type": m.kind, "series": series}
+        return out
+
+    def prometheus(self):
+        lines = []
+        def fmt(labels, extra=None):
+            items = list(labels.items()) + ([extra] if extra else [])
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}" if items else ""
+        for name, m in sorted(self.metrics.items()):
+            lines += [f"# HELP {name} {m.help}", f"# TYPE {name} {m.kind}"]
+            with m.lock: items = [(dict(k), v) for k, v in m.values.items()]
+            for labels, v in items:
+                if m.kind != "histogram":
+                    lines.append(f"{name}{fmt(labels)} {v}"); continue
+                acc = 0
+                for le, c in zip(list(m.buckets) + ["+Inf"], v["counts"]):
+                    acc += c; lines.append(f"{name}_bucket{fmt(labels, ('le', le))} {acc}")
+                lines += [f"{name}_sum{fmt(labels)} {v['sum']}", f"{name}_count{fmt(labels)} {v['count']}"]
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+counter, gauge, histogram = REGISTRY.counter, REGISTRY.gauge, REGISTRY.histogram
+
+# Shared series used by every scraper
+REQUEST_SECONDS = histogram("scrape_request_seconds", "HTTP request / page load latency")
+REQUESTS = counter("scrape_requests_total", "Requests by backend and HTTP status")
+RETRIES = counter("scrape_retries_total", "Retried requests")
+RATE_LIMITED = counter("scrape_rate_limited_total", "HTTP 429 responses")
+PARSE_SECONDS = histogram("scrape_parse_seconds", "Time to parse one page/fragment/batch", (0.001, 0.01, 0.05, 0.1, 0.5, 1, 5))
+ROWS = counter("scrape_rows_total", "Rows written")
+ROWS_PER_SECOND = gauge("scrape_rows_per_second", "Rows/second of the last run")
+STAGE_SECONDS = gauge("scrape_stage_seconds", "Seconds per stage of the last run")
+BATCH_WAIT_SECONDS = histogram("scrape_batch_wait_seconds", "Browser wait for a \"show more\" batch / page settle")
+SHARD_FAILURES = counter("job_shard_failures_total", "Job shards that raised")
+# Clustering pipeline
+ROWS_DROPPED = counter("pipeline_rows_dropped_total", "Rows removed by cleaning")
+FIT_SECONDS = gauge("pipeline_fit_seconds", "Model fit time of the last run")
+
+# ======================= Structured log =======================
+_log_lock = threading.Lock()
+
+def configure(log_path=None, port=None):
+    global LOG_PATH
+    if log_path: LOG_PATH = log_path
+    if port: serve(port)
+
+def event(name, **fields):
+    # One JSON object per line; no-op unless a log path is configured
+    if not LOG_PATH: return
+    rec = json.dumps({"ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + f".{int(time.time() * 1000) % 1000:03d}Z",
+                      "event": name, **fields}, default=str)
+    with _log_lock, open(LOG_PATH, "a", encoding="utf-8") as f: f.write(rec + "\n")
+
+def flush(**fields):
+    # Dump every metric into the log as a final "metrics" event
+    event("metrics", **fields, metrics=REGISTRY.snapshot())
+
+def request(backend, status, seconds, **fields):
+    # One HTTP request / page load: latency, status count, 429s, plus a log line
+    REQUEST_SECONDS.observe(seconds, backend=backend)
+    REQUESTS.inc(backend=backend, status=status)
+    if status == 429: RATE_LIMITED.inc(backend=backend)
+    event("request", backend=backend, status=status, seconds=round(seconds, 4), **fields)
+
+def retry(backend, reason, n=1, **fields):
+    RETRIES.inc(n, backend=backend, reason=reason)
+    event("retry", backend=backend, reason=reason, count=n, **fields)
+
+def observe_report(report):
+    # A timing.StageTimer report → rows/sec + per-stage gauges (+ an event)
+    b = report["backend"]
+    ROWS.inc(report["rows"], backend=b)
+    if report["rows_per_s"] is not None: ROWS_PER_SECOND.set(report["rows_per_s"], backend=b)
+    for stage, sec in report["stages"].items(): STAGE_SECONDS.set(sec, backend=b, stage=stage)
+    event("run", **{k: v for k, v in report.items() if k != "waits"})
+
+# ======================= Prometheus endpoint =======================
+_server = None
+
+def serve(port=PORT, host=HOST):
+    # GET /metrics → Prometheus text format, from a daemon thread
+    global _server
+    if _server is not None: return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404); self.end_headers(); return
+            body = REGISTRY.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body))); self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args): pass
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    print(f" metrics → http://{host}:{_server.server_address[1]}/metrics", file=sys.stderr)
+    return _server
@@ -0,0 +1,74 @@
+import numpy as np, pandas as pd
+
+# ---------- Shared schema ----------
+TARGET_COLUMNS = [
+    "Rank","Name","Symbol","Price",
+    "Change_1h","Change_24h","Change_7d","Change_30d",
+    "Volume_24h","Circulating_Supply","Total_Supply","Market_Cap",
+    "Id"    # CoinGecko id (API only; blank for page scrapes) — unique where Name+Symbol is not
+]
+TEXT_COLUMNS = ["Name", "Symbol", "Id"]
+NUMERIC_COLUMNS = [c for c in TARGET_COLUMNS if c not in TEXT_COLUMNS]
+SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+# "$1,234.5", "-0.4%", "19.94M", "1.2e-05" → number + optional K/M/B/T suffix
+_NUMBER = r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:E[-+]?\d+)?)([KMBT]?)$"
+
+# ======================= Vectorized parsing =======================
+def to_float(s):
+    # One pass of pandas string ops over the whole column; anything that is not a
+    # number (blank, "-", "N/A", "∞") becomes NaN instead of raising.
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    t = (s.astype("string")
+          .str.upper()
+          .str.replace("−", "-", regex=False)
+          .str.replace(r"[$,%\s]", "", regex=True))
+    parts = t.str.extract(_NUMBER)
+    num = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    mult = parts[1].map(SUFFIXES).to_numpy(dtype="float64", na_value=1.0)
+    return pd.Series(num * mult, index=s.index, name=s.name)
+
+def normalize_frame(df, columns=NUMERIC_COLUMNS):
+    out = df.copy()
+    for c in columns:
+        if c not in out.columns: continue
+        out[c] = to_float(out[c])
+    if "Rank" in columns and "Rank" in out.columns:
+        out["Rank"] = out["Rank"].round().astype("Int64")
+    return out
+
+# ======================= Typed schema =======================
+PCT_COLUMNS = ["Change_1h", "Change_24h", "Change_7d", "Change_30d"]
+MONEY_COLUMNS = ["Price", "Volume_24h", "Market_Cap"]
+SUPPLY_COLUMNS = ["Circulating_Supply", "Total_Supply"]
+DTYPES = {"Rank": "Int64", **{c: "string" for c in TEXT_COLUMNS},
+          **{c: "float64" for c in NUMERIC_COLUMNS if c != "Rank"}}
+
+def typed_frame(df):
+    # Scraper output contract: TARGET_COLUMNS order, numbers as numbers
+    out = normalize_frame(df, [c for c in NUMERIC_COLUMNS if c in df.columns])
+    for c in TARGET_COLUMNS:
+        if c not in out.columns: out[c] = "" if c in TEXT_COLUMNS else np.nan
+    out = out[TARGET_COLUMNS]
+    for c in TEXT_COLUMNS: out[c] = out[c].fillna("").astype("string")
+    return out.astype(DTYPES)
+
+# Compact in-memory layout for long histories and clustering. Percentages are
+# published to 2 decimals and fit float32; prices, caps and supplies span
+# 1e-10..1e15 and stay float64. Names/symbols repeat across snapshots.
+COMPACT_DTYPES = {"Rank": "Int16", "Name": "category", "Symbol": "category", "Cluster": "int16",
+                  **{c: "float32" for c in PCT_COLUMNS}, **{c: "float64" for c in MONEY_COLUMNS + SUPPLY_COLUMNS}}
+
+def compact_frame(df, exact=()):
+    # `exact`: numeric columns to keep float64 (e.g. model features, whose float32
+    # rounding would shift fits and averages). Columns outside the schema are left alone.
+    dtypes = {c: ("float64" if c in exact else t) for c, t in COMPACT_DTYPES.items() if c in df.columns}
+    mx = df["Rank"].max() if "Rank" in dtypes else None
+    if pd.notna(mx) and mx > np.iinfo(np.int16).max: dtypes["Rank"] = "Int32"     # all-NA / empty → max is NA
+    return df.astype(dtypes)
+
+def ensure_columns(df):
+    for c in TARGET_COLUMNS:
+        if c not in df.columns: df[c] = ""
+    return df[TARGET_COLUMNS]
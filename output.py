@@ -0,0 +1,110 @@
+import os, itertools, pandas as pd
+from normalize import TARGET_COLUMNS, PCT_COLUMNS, MONEY_COLUMNS, SUPPLY_COLUMNS, typed_frame, compact_frame
+
+# ---------- format helpers (presentation only — never written by the scrapers) ----------
+def pct_to_str(x):
+    if x is None or x == "" or pd.isna(x): return ""
+    try: return f"{float(x):.2f}%"
+    except: return str(x)
+
+def money_to_str(x):
+    if x is None or x == "" or pd.isna(x): return ""
+    try: return f"${float(x):,.8f}".rstrip("0").rstrip(".")
+    except: return str(x)
+
+def num_to_str(x):
+    if x is None or x == "" or pd.isna(x): return ""
+    try: return f"{float(x):,.8f}".rstrip("0").rstrip(".")
+    except: return str(x)
+
+def format_frame(df):
+    # Human-readable view of a typed frame ("$1,234.5", "0.42%")
+    out = df.copy()
+    for cols, fmt in ((PCT_COLUMNS, pct_to_str), (MONEY_COLUMNS, money_to_str), (SUPPLY_COLUMNS, num_to_str)):
+        for c in cols:
+            if c in out.columns: out[c] = out[c].map(fmt).astype("string")
+    return out
+
+# ======================= Typed I/O =======================
+def arrow_schema():
+    import pyarrow as pa
+    types = {"Rank": pa.int32(), "Name": pa.string(), "Symbol": pa.string(), "Id": pa.string()}
+    return pa.schema([(c, types.get(c, pa.float64())) for c in TARGET_COLUMNS])
+
+def infer_format(path, fmt=None):
+    if fmt: return fmt
+    ext = os.path.splitext(str(path))[1].lower()
+    return {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(ext, "csv")
+
+def write_frame(df, path, fmt=None, pretty=False):
+    # pretty: CSV only, written through format_frame ("$1,234.5", "0.42%"); read_frame parses it back
+    fmt = infer_format(path, fmt)
+    df = typed_frame(df)
+    if fmt == "csv":
+        (format_frame(df) if pretty else df).to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, schema=arrow_schema(), preserve_index=False)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, path, compression="zstd")
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, path, compression="zstd")
+    return len(df)
+
+def read_frame(path, fmt=None, compact=False, exact=()):
+    fmt = infer_format(path, fmt)
+    if fmt == "parquet": df = pd.read_parquet(path)
+    elif fmt == "arrow": df = pd.read_feather(path)
+    else: df = pd.read_csv(path, float_precision="round_trip")
+    # typed_frame also upgrades legacy formatted CSVs ("$1,234", "0.4%", "19.94M")
+    df = typed_frame(df)
+    return compact_frame(df, exact) if compact else df
+
+def write_csv_parts(df, parts, combined=None, chunk_rows=5000, encoding="utf-8"):
+    # parts: [(path, row positions)]. Each chunk of rows is formatted once and the
+    # text goes both to its part file and to `combined` (all parts, in order), so
+    # train/test/full come out of a single serialization pass.
+    header = df.iloc[:0].to_csv(index=False)
+    sinks = [open(p, "w", encoding=encoding, newline="") for p, _ in parts]
+    full = open(combined, "w", encoding=encoding, newline="") if combined else None
+    try:
+        for f in sinks + ([full] if full else []): f.write(header)
+        for f, (_, rows) in zip(sinks, parts):
+            for i in range(0, len(rows), chunk_rows):
+                text = df.iloc[rows[i:i + chunk_rows]].to_csv(index=False, header=False)
+                f.write(text)
+                if full: full.write(text)
+    finally:
+        for f in sinks + ([full] if full else []): f.close()
+    return [len(rows) for _, rows in parts]
+
+def write_rows(rows, path, fmt=None, chunk_rows=500, pretty=False):
+    # Streams an iterable of row dicts to `path` in typed chunks; memory is bounded
+    # by chunk_rows, not by the length of the table.
+    fmt = infer_format(path, fmt)
+    rows = iter(rows); n = 0; writer = None
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk and n: break
+            df = typed_frame(pd.DataFrame(chunk))
+            if fmt == "csv":
+                (format_frame(df) if pretty else df).to_csv(path, mode="a" if n else "w", header=not n, index=False,
+                          encoding="utf-8" if n else "utf-8-sig")
+            else:
+                import pyarrow as pa
+                table = pa.Table.from_pandas(df, schema=arrow_schema(), preserve_index=False)
+                if writer is None:
+                    if fmt == "parquet":
+                        import pyarrow.parquet as pq
+                        writer = pq.ParquetWriter(path, arrow_schema(), compression="zstd")
+                    else:
+                        writer = pa.ipc.new_file(path, arrow_schema())
+                writer.write_table(table) if fmt == "parquet" else writer.write(table)
+            n += len(df)
+            if not chunk: break
+    finally:
+        if writer is not None: writer.close()
+    return n
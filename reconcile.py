@@ -0,0 +1,116 @@
+import sys, time, warnings, numpy as np, pandas as pd
+from coin_index import CoinIndex, INDEX_PATH
+from normalize import NUMERIC_COLUMNS, TEXT_COLUMNS, PCT_COLUMNS
+from output import read_frame
+
+# ---------- Shared config ----------
+SOURCE_FILES = {"api": "coingecko_api.csv", "bs4": "coingecko_bs4.csv", "selenium": "coingecko_selenium.csv"}
+PRIORITY = ["api", "selenium", "bs4"]                    # best precision first (API has full floats)
+SOURCE_COST = {"direct": 1, "api": 1, "bs4": 3, "selenium": 4}
+VALUE_COLUMNS = [c for c in NUMERIC_COLUMNS if c != "Rank"]
+# |a - b| <= abs + rel * |consensus|. Site pages round % to 0.1 and scrapes are seconds apart.
+TOLERANCE = {
+    **{c: (0.15, 0.0) for c in PCT_COLUMNS},
+    "Price": (0.0, 0.02), "Market_Cap": (0.0, 0.02), "Volume_24h": (0.0, 0.10),
+    "Circulating_Supply": (0.0, 0.01), "Total_Supply": (0.0, 0.01),
+}
+MIN_AGREEMENT = 0.95
+
+# ======================= Alignment =======================
+def align(frames, index):
+    # frames: {source: DataFrame} → (keys, {source: frame reindexed on keys}). Identities a
+    # source reports outright (Symbol / Id) are indexed from every frame before any frame is
+    # keyed, so glued names confirm the same way whatever order the frames come in; names no
+    # source confirms still line up across bs4/selenium on their raw-name (provisional) key.
+    for df in frames.values():
+        explicit = np.zeros(len(df), dtype=bool)
+        for col in ("Symbol", "Id"):
+            if col in df.columns: explicit |= df[col].astype("string").fillna("").ne("").to_numpy()
+        if explicit.any(): index.canonical(df[explicit])
+    keyed = {}
+    for src, df in frames.items():
+        df = index.canonical(df)
+        raw = index.provisional(df["Coin_Key"])                            # unconfirmed split: keep the scraped name
+        df = df.assign(Name=df["Coin_Name"].where(~raw, df["Name"]), Symbol=df["Coin_Symbol"].where(~raw, ""))
+        df = df[df["Coin_Key"] >= 0].sort_values("Rank", na_position="last").drop_duplicates("Coin_Key")
+        keyed[src] = df.set_index("Coin_Key")
+    keys = np.unique(np.concatenate([d.index.to_numpy() for d in keyed.values()]))
+    return keys, {src: d.reindex(keys) for src, d in keyed.items()}
+
+# ======================= Reconciliation =======================
+def reconcile(frames, index=None, tolerance=TOLERANCE, priority=PRIORITY):
+    index = CoinIndex() if index is None else index
+    keys, aligned = align(frames, index)
+    sources = [s for s in priority if s in aligned] + [s for s in aligned if s not in priority]
+    src_names = np.array(sources, dtype=object)
+    best = pd.DataFrame(index=pd.Index(keys, name="Coin_Key"))
+    prov = pd.DataFrame(index=best.index)
+    issues = []
+    agree_counts = {s: {} for s in sources}
+
+    for col in ["Rank"] + VALUE_COLUMNS:
+        V = np.column_stack([aligned[s][col].to_numpy(dtype=np.float64, na_value=np.nan) for s in sources])
+        present = ~np.isnan(V)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            consensus = np.nanmedian(V, axis=1)
+        a, r = tolerance.get(col, (0.5, 0.0))
+        agree = present & (np.abs(V - consensus[:, None]) <= a + r * np.abs(consensus[:, None]))
+        # First source (in priority order) that agrees with the consensus; else first present
+        pick = np.where(agree.any(1), agree.argmax(1), present.argmax(1))
+        rows = np.arange(len(keys))
+        has = present.any(1)
+        best[col] = np.where(has, V[rows, pick], np.nan)
+        prov[col] = np.where(has, src_names[pick], None)
+        for j, s in enumerate(sources):
+            agree_counts[s][col] = (int(agree[:, j].sum()), int(present[:, j].sum()))
+        bad = present & ~agree
+        bi, bj = np.nonzero(bad)
+        if len(bi):
+            issues.append(pd.DataFrame({
+                "Coin_Key": keys[bi], "column": col, "source": src_names[bj],
+                "value": V[bi, bj], "consensus": consensus[bi], "diff": V[bi, bj] - consensus[bi],
+            }))
+
+    for col in TEXT_COLUMNS:
+        T = np.column_stack([aligned[s][col].astype("string").fillna("").to_numpy(dtype=object) for s in sources])
+        pick = (T != "").argmax(1)
+        best[col] = T[np.arange(len(keys)), pick]
+        prov[col] = src_names[pick]
+
+    best["Rank"] = best["Rank"].round().astype("Int64")
+    best = best[["Rank"] + TEXT_COLUMNS + VALUE_COLUMNS].sort_values("Rank", na_position="last")
+    prov = prov.loc[best.index, best.columns]
+    discrepancies = pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(
+        columns=["Coin_Key", "column", "source", "value", "consensus", "diff"])
+    return best.reset_index(), prov.reset_index(), discrepancies, summarize(agree_counts, len(keys))
+
+def summarize(agree_counts, n_keys):
+    rows = []
+    for src, cols in agree_counts.items():
+        ok = sum(a for a, _ in cols.values()); n = sum(p for _, p in cols.values())
+        rows.append({"source": src, "cost": SOURCE_COST.get(src), "coverage": cols["Rank"][1] / max(n_keys, 1),
+                     "agreement": ok / max(n, 1), **{f"agree_{c}": a / max(p, 1) for c, (a, p) in cols.items()}})
+    return pd.DataFrame(rows).sort_values(["cost", "agreement"], ascending=[True, False]).reset_index(drop=True)
+
+def cheapest_accurate(summary, min_agreement=MIN_AGREEMENT, min_coverage=MIN_AGREEMENT):
+    ok = summary[(summary["agreement"] >= min_agreement) & (summary["coverage"] >= min_coverage)]
+    return ok.iloc[0]["source"] if len(ok) else None
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    # python reconcile.py [api=path] [bs4=path] [selenium=path]
+    files = dict(SOURCE_FILES, **dict(a.split("=", 1) for a in sys.argv[1:]))
+    frames = {src: read_frame(path) for src, path in files.items()}
+    index = CoinIndex.load(INDEX_PATH)
+    t = time.perf_counter()
+    best, prov, discrepancies, summary = reconcile(frames, index)
+    ms = (time.perf_counter() - t) * 1000
+    index.save(INDEX_PATH)
+
+    out = best.join(prov.drop(columns=["Coin_Key"]).add_suffix("_source"))
+    out.to_csv("coingecko_reconciled.csv", index=False)
+    discrepancies.to_csv("coingecko_discrepancies.csv", index=False)
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(f" reconcile → {len(best)} coins, {len(discrepancies)} discrepancies in {ms:.0f} ms")
+    print(f" cheapest accurate source: {cheapest_accurate(summary) or 'none (agreement below threshold)'}")
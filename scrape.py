@@ -0,0 +1,184 @@
+import sys, json, argparse, pandas as pd
+import metrics
+from dataclasses import dataclass, asdict
+from normalize import typed_frame
+from output import write_frame, write_rows
+from timing import StageTimer, format_report
+
+# ---------- Shared config ----------
+TARGET_TOTAL_ROWS = 1250
+API_PER_PAGE = 250
+
+@dataclass
+class ScrapeConfig:
+    rows: int = TARGET_TOTAL_ROWS
+    concurrency: int = 4          # API requests in flight / browser workers / fragment fetchers
+    rate: float = 0.5             # api: token-bucket requests/second
+    out_format: str = "csv"       # csv | parquet | arrow
+    pretty: bool = False          # csv: human-readable "$1,234.5" / "0.42%" cells (output.format_frame)
+    output: str = None            # default: coingecko_<backend>.<out_format>
+    url: str = None               # override the backend's endpoint (e.g. the local stub)
+    headless: bool = False
+    cache: bool = False           # api: on-disk HTTP cache (http_cache.CachedSession)
+    offline: bool = False         # api: replay the cache only
+    stream: bool = False          # bs4: stream rows to the sink; parse/normalize land in "write"
+    store_snapshot: bool = False  # also append to the snapshots/ time-series store
+    delta: bool = False           # append inserts/updates/removals to deltas/<backend>/ instead of a full file
+    resume: bool = False          # api/bs4/selenium: checkpoint shards under .jobs/ and resume an interrupted run
+
+    def out_name(self, backend):
+        return self.output or f"coingecko_{backend}.{self.out_format}"
+
+# ======================= Backend registry =======================
+# name → fn(config, timer) returning a typed DataFrame (or an iterator of row dicts
+# when streaming). Backends import their scraper lazily so e.g. "api" runs
+# without Selenium installed.
+BACKENDS = {}
+
+def register_backend(name):
+    def deco(fn):
+        BACKENDS[name] = fn; return fn
+    return deco
+
+@register_backend("api")
+def api_backend(cfg, timer):
+    from scraping_api import API_URL, fetch_via_api, fetch_via_api_async, fetch_via_api_job
+    pages, url = -(-cfg.rows // API_PER_PAGE), cfg.url or API_URL
+    if cfg.concurrency > 1 and not cfg.cache and not cfg.resume:
+        df = fetch_via_api_async(pages, API_PER_PAGE, url, concurrency=cfg.concurrency,
+                                 rate=cfg.rate, burst=cfg.concurrency, timer=timer)
+    else:
+        session = None
+        if cfg.cache:
+            from http_cache import CachedSession
+            session = CachedSession(offline=cfg.offline)
+        if cfg.resume:
+            df = fetch_via_api_job(pages, API_PER_PAGE, url, session, workers=cfg.concurrency, rate=cfg.rate, timer=timer)
+        else:
+            df = fetch_via_api(pages, API_PER_PAGE, url, session=session, timer=timer)
+    df = df.head(cfg.rows)        # whole pages come back; trim to the target like direct
+    # Every page served from disk without asking the server: nothing new was observed
+    df.attrs["from_cache"] = bool(session and session.stats["fresh"]
+                                  and not session.stats["downloaded"] + session.stats["revalidated"])
+    return df
+
+@register_backend("bs4")
+def bs4_backend(cfg, timer):
+    from driver_pool import get_pool
+    from scraping_bs4 import fetch_page_source, iter_rows, scrape_via_bs4, scrape_via_bs4_job
+    from waits import WaitLog
+    if cfg.resume:
+        pool = get_pool(size=cfg.concurrency, headless=cfg.headless)
+        return scrape_via_bs4_job(cfg.rows, pool=pool, timer=timer, max_workers=cfg.concurrency)
+    pool = get_pool(headless=cfg.headless)
+    if cfg.stream:
+        log = WaitLog("bs4")
+        with timer.stage("fetch"): page_source = fetch_page_source(cfg.rows, pool, log)
+        timer.extra["waits"] = log.summary()
+        return iter_rows(page_source)
+    return scrape_via_bs4(cfg.rows, pool, timer=timer)
+
+@register_backend("selenium")
+def selenium_backend(cfg, timer):
+    from driver_pool import get_pool
+    from scraping_selenium import scrape_via_selenium_multithreaded, scrape_via_selenium_job
+    pool = get_pool(size=cfg.concurrency, headless=cfg.headless)
+    if cfg.resume: return scrape_via_selenium_job(cfg.rows, max_workers=cfg.concurrency, pool=pool, timer=timer)
+    return scrape_via_selenium_multithreaded(cfg.rows, max_workers=cfg.concurrency, pool=pool, timer=timer)
+
+@register_backend("direct")
+def direct_backend(cfg, timer):
+    from scraping_direct import BASE_URL, scrape_via_direct
+    return scrape_via_direct(cfg.rows, cfg.url or BASE_URL, max_workers=cfg.concurrency, timer=timer)
+
+# ======================= Runner =======================
+def run(backend, cfg=None):
+    cfg = cfg or ScrapeConfig()
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}; choose from {', '.join(BACKENDS)}")
+    timer = StageTimer(backend)
+    out_name = cfg.out_name(backend)
+    result = BACKENDS[backend](cfg, timer)
+    # A cache replay is not a new observation: keep it out of the delta log / snapshot store
+    replay = getattr(result, "attrs", {}).get("from_cache", False)
+    if replay and (cfg.delta or cfg.store_snapshot):
+        print(f" {backend} → every page came from the HTTP cache; not appending to the delta log / snapshot store")
+        if cfg.delta: return result, observed(timer)
+    if cfg.delta:
+        from delta_log import DeltaLog
+        with timer.stage("write"):
+            df = result if hasattr(result, "columns") else typed_frame(pd.DataFrame(list(result)))
+            entry = DeltaLog(source=backend).append(df)
+            timer.rows, timer.extra["delta"] = len(df), entry
+        print(f" {backend} → delta #{entry['seq']}: +{entry['inserts']} ~{entry['updates']} -{entry['deletes']} of {entry['rows']} rows")
+        if cfg.store_snapshot:
+            from snapshot_store import SnapshotStore
+            with timer.stage("store"): SnapshotStore().append(df, source=backend)
+        return df, observed(timer)
+    with timer.stage("write"):
+        if hasattr(result, "columns"):
+            df = result; timer.rows = write_frame(df, out_name, cfg.out_format, cfg.pretty)
+        else:
+            df = None; timer.rows = write_rows(result, out_name, cfg.out_format, pretty=cfg.pretty)
+    if cfg.store_snapshot and not replay:
+        from output import read_frame
+        from snapshot_store import SnapshotStore
+        with timer.stage("store"):
+            SnapshotStore().append(df if df is not None else read_frame(out_name), source=backend)
+    print(f" {backend} → saved {timer.rows} rows to {out_name}")
+    return df, observed(timer)
+
+def observed(timer):
+    # Rows/sec and stage times into the metrics registry (and the JSON log, if enabled)
+    report = timer.report()
+    metrics.observe_report(report)
+    return report
+
+def parse_args(argv):
+    d = ScrapeConfig()
+    p = argparse.ArgumentParser(description="Scrape the CoinGecko top-N table with one or more backends.")
+    p.add_argument("backends", nargs="+", choices=sorted(BACKENDS), metavar="backend", help=f"one or more of: {', '.join(BACKENDS)}")
+    p.add_argument("--rows", type=int, default=d.rows)
+    p.add_argument("--concurrency", type=int, default=d.concurrency)
+    p.add_argument("--rate", type=float, default=d.rate, help="api: requests/second")
+    p.add_argument("--format", dest="out_format", choices=["csv", "parquet", "arrow"], default=d.out_format)
+    p.add_argument("--pretty", action="store_true", help="csv: write formatted cells ($1,234.5, 0.42%%) instead of raw numbers")
+    p.add_argument("--output", help="output path (single backend only)")
+    p.add_argument("--url", help="override the endpoint, e.g. a stub_server.py URL")
+    p.add_argument("--headless", action="store_true")
+    p.add_argument("--cache", action="store_true", help="api: use the on-disk HTTP cache")
+    p.add_argument("--offline", action="store_true", help="api: replay the HTTP cache without network")
+    p.add_argument("--stream", action="store_true", help="bs4: stream rows straight to the output file")
+    p.add_argument("--store", dest="store_snapshot", action="store_true", help="append to the snapshot store")
+    p.add_argument("--delta", action="store_true", help="write only changed rows to the replayable delta log")
+    p.add_argument("--resume", action="store_true", help="checkpoint shards to .jobs/; rerun to resume after a failure")
+    p.add_argument("--timings", help="write per-backend stage timings as JSON to this path")
+    p.add_argument("--metrics-log", default=metrics.LOG_PATH, help="append structured JSON-lines events (requests, retries, runs) here")
+    p.add_argument("--metrics-port", type=int, default=metrics.PORT, help="serve Prometheus text on :PORT/metrics while running")
+    args = p.parse_args(argv)
+    if args.output and len(args.backends) > 1: p.error("--output needs a single backend")
+    if args.offline and not args.cache: p.error("--offline replays the HTTP cache; add --cache")
+    if args.offline and (args.store_snapshot or args.delta):
+        p.error("--offline replays old responses; they don't belong in --store / --delta")
+    if args.pretty and args.out_format != "csv": p.error("--pretty only applies to --format csv")
+    fields = {k: v for k, v in vars(args).items() if k in asdict(d)}
+    return args.backends, ScrapeConfig(**fields), args
+
+def main(argv=None):
+    backends, cfg, args = parse_args(sys.argv[1:] if argv is None else argv)
+    metrics.configure(args.metrics_log, args.metrics_port)
+    reports = []
+    try:
+        for backend in backends:
+            _, report = run(backend, cfg)
+            reports.append(report)
+    finally:
+        metrics.flush(command="scrape", backends=backends)
+    print("\nTimings:")
+    for r in reports: print(format_report(r))
+    if args.timings:
+        with open(args.timings, "w", encoding="utf-8") as f: json.dump(reports, f, indent=2)
+    return reports
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,200 @@
-import time, requests, pandas as pd
+import time, random, asyncio, email.utils, requests, pandas as pd
+import metrics
+from normalize import typed_frame
+from timing import StageTimer
 
 # ---------- Shared config ----------
 TARGET_TOTAL_ROWS = 1250
 BASE_URL = "https://www.coingecko.com/en/all-cryptocurrencies"
-TARGET_COLUMNS = [
-    "Rank","Name","Symbol","Price",
-    "Change_1h","Change_24h","Change_7d","Change_30d",
-    "Volume_24h","Circulating_Supply","Total_Supply","Market_Cap"
-]
-
-# ---------- format helpers ----------
-def pct_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):.2f}%"
-    except: return str(x)
-
-def money_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"${float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def num_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def ensure_columns(df):
-    for c in TARGET_COLUMNS:
-        if c not in df.columns: df[c] = ""
-    return df[TARGET_COLUMNS]
+API_URL = "https://api.coingecko.com/api/v3/coins/markets"
 
 # ======================= API =======================
-def fetch_via_api(max_pages=5, per_page=250):
-    url = "https://api.coingecko.com/api/v3/coins/markets"
-    params = {
+def coin_to_row(coin):
+    # Keep the API's numbers as numbers; formatting is output.format_frame's job
+    return {
+        "Rank": coin.get("market_cap_rank"),
+        "Name": coin.get("name",""),
+        "Symbol": (coin.get("symbol","") or "").upper(),
+        "Price": coin.get("current_price"),
+        "Change_1h": coin.get("price_change_percentage_1h_in_currency"),
+        "Change_24h": coin.get("price_change_percentage_24h_in_currency") or coin.get("price_change_percentage_24h"),
+        "Change_7d": coin.get("price_change_percentage_7d_in_currency"),
+        "Change_30d": coin.get("price_change_percentage_30d_in_currency"),
+        "Volume_24h": coin.get("total_volume"),
+        "Circulating_Supply": coin.get("circulating_supply"),
+        "Total_Supply": coin.get("total_supply"),
+        "Market_Cap": coin.get("market_cap"),
+        "Id": coin.get("id") or "",
+    }
+
+def api_params(page, per_page):
+    return {
         "vs_currency": "usd",
         "order": "market_cap_desc",
         "per_page": per_page,
-        "page": 1,
-        "sparkline": False,
+        "page": page,
+        "sparkline": "false",
         "price_change_percentage": "1h,24h,7d,30d"
     }
+
+def fetch_via_api(max_pages=5, per_page=250, url=API_URL, session=None, timer=None):
+    # session: anything with requests' get(url, params=...) — e.g. http_cache.CachedSession
+    get = (session or requests).get
+    timer = timer or StageTimer("api")
+    params = api_params(1, per_page)
     all_rows, page_count = [], 0
     print("Fetching (API)…")
     while page_count < max_pages:
-        r = requests.get(url, params=params)
+        with timer.stage("fetch"):
+            t = time.perf_counter(); r = get(url, params=params)
+            cached = getattr(r, "from_cache", False)
+            metrics.request("api", "cache" if cached else r.status_code, time.perf_counter() - t, page=params["page"])
         if r.status_code != 200:
             print(f"API error {r.status_code}: {r.text[:120]}")
             if r.status_code == 429:
+                metrics.retry("api", "429", page=params["page"])
                 print("Rate limit → sleeping 60s."); time.sleep(60); continue
             break
+        with timer.stage("parse"), metrics.PARSE_SECONDS.time(backend="api"):
+            data = r.json()
+            rows = [coin_to_row(coin) for coin in data] if isinstance(data, list) else []
+        if not rows: break
+        all_rows.extend(rows)
+        print(f"  API page {params['page']} → {len(rows)} rows" + (" (cache)" if cached else ""))
+        params["page"] += 1; page_count += 1
+        if not cached:
+            with timer.stage("fetch"): time.sleep(1)
+    with timer.stage("normalize"): return typed_frame(pd.DataFrame(all_rows))
+
+# ======================= API (resumable job) =======================
+class ApiError(RuntimeError):
+    def __init__(self, status, text, retry_after=None):
+        super().__init__(f"API error {status}: {text[:120]}")
+        self.status, self.retry_after = status, retry_after
+
+def fetch_api_page(page, per_page=250, url=API_URL, session=None, timeout=30):
+    t = time.perf_counter()
+    r = (session or requests).get(url, params=api_params(page, per_page), timeout=timeout)
+    metrics.request("api", "cache" if getattr(r, "from_cache", False) else r.status_code, time.perf_counter() - t, page=page)
+    if r.status_code != 200:
+        retry = parse_retry_after(r.headers.get("Retry-After")) if r.status_code == 429 else None
+        raise ApiError(r.status_code, r.text, retry)
+    with metrics.PARSE_SECONDS.time(backend="api"):
         data = r.json()
-        if not isinstance(data, list) or not data: break
-        for coin in data:
-            all_rows.append({
-                "Rank": str(coin.get("market_cap_rank") or "").strip(),
-                "Name": coin.get("name",""),
-                "Symbol": (coin.get("symbol","") or "").upper(),
-                "Price": money_to_str(coin.get("current_price")),
-                "Change_1h": pct_to_str(coin.get("price_change_percentage_1h_in_currency")),
-                "Change_24h": pct_to_str(coin.get("price_change_percentage_24h_in_currency") or coin.get("price_change_percentage_24h")),
-                "Change_7d": pct_to_str(coin.get("price_change_percentage_7d_in_currency")),
-                "Change_30d": pct_to_str(coin.get("price_change_percentage_30d_in_currency")),
-                "Volume_24h": money_to_str(coin.get("total_volume")),
-                "Circulating_Supply": num_to_str(coin.get("circulating_supply")),
-                "Total_Supply": num_to_str(coin.get("total_supply")),
-                "Market_Cap": money_to_str(coin.get("market_cap")),
-            })
-        print(f"  API page {params['page']} → {len(data)} rows")
-        params["page"] += 1; page_count += 1; time.sleep(1)
-    return ensure_columns(pd.DataFrame(all_rows))
+        return typed_frame(pd.DataFrame([coin_to_row(c) for c in data] if isinstance(data, list) else []))
 
+def fetch_via_api_job(max_pages=5, per_page=250, url=API_URL, session=None, workers=1, rate=0.5, timer=None):
+    # One shard per page, checkpointed as it lands; a failed page fails the run
+    # (instead of truncating it) and the next run fetches only the missing pages.
+    from jobs import run_job
+    timer = timer or StageTimer("api")
+    print("Fetching (API, resumable job)…")
+    with timer.stage("fetch"):
+        df = run_job("api", range(1, max_pages + 1), lambda p: fetch_api_page(p, per_page, url, session),
+                     {"pages": max_pages, "per_page": per_page, "url": url}, max_workers=workers, rate=rate)
+    with timer.stage("normalize"): return typed_frame(df)
 
-# ======================= Run & Save =======================
-if __name__ == "__main__":
-    method = "api"
+# ======================= API (async) =======================
+def parse_retry_after(value, default=60.0):
+    if not value: return default
+    try: return max(0.0, float(value))
+    except ValueError: pass
+    try: return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError): return default
+
+class TokenBucket:
+    # `rate` requests/second on average, bursts of up to `capacity`.
+    # pause() empties the bucket and blocks every waiter (used for Retry-After).
+    def __init__(self, rate=0.5, capacity=1):
+        self.rate, self.capacity = float(rate), float(capacity)
+        self.tokens, self.updated = float(capacity), time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
 
-    df = fetch_via_api(max_pages=5, per_page=250)
-    out_name = "coingecko_api.csv"
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now); continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1; return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
 
-    df.to_csv(out_name, index=False, encoding="utf-8-sig")
-    print(f" {method} → saved {len(df)} rows to {out_name}")
+    def pause(self, seconds):
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens, self.updated = 0.0, max(self.updated, now)
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    # "full jitter": uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+async def fetch_page_async(session, bucket, url, page, per_page, max_retries=5):
+    import aiohttp
+    params = api_params(page, per_page)
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        t = time.perf_counter()
+        try:
+            async with session.get(url, params=params) as r:
+                if r.status == 200:
+                    data = await r.json(content_type=None)
+                    metrics.request("api", r.status, time.perf_counter() - t, page=page, attempt=attempt)
+                    return data if isinstance(data, list) else []
+                text = await r.text()
+                metrics.request("api", r.status, time.perf_counter() - t, page=page, attempt=attempt)
+                print(f"API error {r.status} on page {page}: {text[:120]}")
+                if r.status == 429:
+                    delay = parse_retry_after(r.headers.get("Retry-After"))
+                    print(f"Rate limit → pausing all requests {delay:.1f}s."); bucket.pause(delay)
+                    if attempt < max_retries: metrics.retry("api", "429", page=page, delay=round(delay, 1))
+                    continue
+                if r.status < 500: return None
+        except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+            # ClientError covers refused/dropped connections and truncated bodies;
+            # ValueError a 200 whose body is not JSON. All retried, none abort the gather.
+            metrics.request("api", "error", time.perf_counter() - t, page=page, attempt=attempt, error=repr(e))
+            print(f"API request failed on page {page}: {e!r}")
+        if attempt < max_retries:
+            metrics.retry("api", "backoff", page=page)
+            await asyncio.sleep(backoff_delay(attempt))
+    return None
+
+async def _fetch_via_api_async(max_pages, per_page, url, concurrency, rate, burst, timeout):
+    import aiohttp
+    bucket = TokenBucket(rate, burst)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        sem = asyncio.Semaphore(concurrency)
+        async def one(page):
+            async with sem:
+                data = await fetch_page_async(session, bucket, url, page, per_page)
+            print(f"  API page {page} → {len(data) if data is not None else 'failed'} rows")
+            return data
+        pages = await asyncio.gather(*(one(p) for p in range(1, max_pages + 1)))
+    return pages
+
+def fetch_via_api_async(max_pages=5, per_page=250, url=API_URL, concurrency=4, rate=0.5, burst=2, timeout=30, timer=None):
+    timer = timer or StageTimer("api")
+    print("Fetching (API, async)…")
+    with timer.stage("fetch"):
+        pages = asyncio.run(_fetch_via_api_async(max_pages, per_page, url, concurrency, rate, burst, timeout))
+    all_rows = []
+    for data in pages:
+        # Same semantics as the serial fetcher: stop at the first failed/empty page
+        if not data: break
+        with timer.stage("parse"): all_rows.extend(coin_to_row(coin) for coin in data)
+    with timer.stage("normalize"): return typed_frame(pd.DataFrame(all_rows))
+
+
+# ======================= Run & Save =======================
+if __name__ == "__main__":
+    # The pre-CLI defaults: serial fetch through the HTTP cache, append to the snapshot store
+    from scrape import main
+    main(["api", "--concurrency", "1", "--cache", "--store"])
@@ -1,131 +1,193 @@
 
-import re, time, pandas as pd
+import re, io, time, pandas as pd
+import metrics
+from driver_pool import get_pool
+from normalize import ensure_columns, to_float, typed_frame
+from timing import StageTimer
+from waits import WaitLog, wait_for_rows, wait_settled
 
 
 # ---------- Shared config ----------
 TARGET_TOTAL_ROWS = 1250
 BASE_URL = "https://www.coingecko.com/en/all-cryptocurrencies"
-TARGET_COLUMNS = [
-    "Rank","Name","Symbol","Price",
-    "Change_1h","Change_24h","Change_7d","Change_30d",
-    "Volume_24h","Circulating_Supply","Total_Supply","Market_Cap"
+ROWS_CSS = "table tbody tr"
+# Fixed sleeps the loader used before event-driven waits; only used to report the saving
+LEGACY_SLEEP = {"load": 1.0, "batch": 0.5 + 2.5}
+
+# ======================= Parsing =======================
+def norm_header(txt):
+    t = re.sub(r"\s+", " ", (txt or "").strip()).lower()
+    # Normalize all variants to a SINGLE canonical key
+    if "24h" in t and ("vol" in t or "volume" in t):
+        t = "24h volume"
+    t = t.replace("volume (24h)", "24h volume").replace("vol (24h)", "24h volume")
+    t = t.replace("marketcap", "market cap").replace("market capitalization", "market cap")
+    t = t.replace("coin name", "coin")
+    return t
+
+def get_header_map(soup):
+    mapping={}
+    for i, th in enumerate(soup.select("table thead th")):
+        lab = norm_header(th.get_text())
+        if lab: mapping[lab]=i
+    return mapping
+
+# Output column → normalized header key (Name/Symbol come from the coin cell)
+ROW_FIELDS = [
+    ("Rank", "#"), ("Name", None), ("Symbol", None), ("Price", "price"),
+    ("Change_1h", "1h"), ("Change_24h", "24h"), ("Change_7d", "7d"), ("Change_30d", "30d"),
+    ("Volume_24h", "24h volume"), ("Circulating_Supply", "circulating supply"),
+    ("Total_Supply", "total supply"), ("Market_Cap", "market cap"),
 ]
 
-# ---------- format helpers ----------
-def pct_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):.2f}%"
-    except: return str(x)
-
-def money_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"${float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def num_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def ensure_columns(df):
-    for c in TARGET_COLUMNS:
-        if c not in df.columns: df[c] = ""
-    return df[TARGET_COLUMNS]
+def safe_text(tds, idx):
+    return tds[idx].get_text(strip=True) if idx is not None and idx < len(tds) else ""
+
+def extract_rows(soup, i):
+    out=[]
+    for r in soup.select("table tbody tr"):
+        tds = r.find_all("td")
+        if not tds: continue
+        name=symbol=""
+        if i.get("coin") is not None and i["coin"] < len(tds):
+            coin_td = tds[i["coin"]]
+            link = coin_td.select_one("a[href*='/coins/']")
+            name = link.get_text(strip=True) if link else coin_td.get_text(strip=True)
+            small = coin_td.select_one("small")
+            if small: symbol = small.get_text(strip=True).upper()
+        out.append({
+            "Rank": safe_text(tds, i.get("#")),
+            "Name": name,
+            "Symbol": symbol,
+            "Price": safe_text(tds, i.get("price")),
+            "Change_1h": safe_text(tds, i.get("1h")),
+            "Change_24h": safe_text(tds, i.get("24h")),
+            "Change_7d": safe_text(tds, i.get("7d")),
+            "Change_30d": safe_text(tds, i.get("30d")),
+            "Volume_24h": safe_text(tds, i.get("24h volume")),
+            "Circulating_Supply": safe_text(tds, i.get("circulating supply")),
+            "Total_Supply": safe_text(tds, i.get("total supply")),
+            "Market_Cap": safe_text(tds, i.get("market cap")),
+        })
+    return out
+
+# ======================= Streaming parser =======================
+def _text(el):
+    return "".join(t.strip() for t in el.itertext()) if el is not None else ""
+
+def _coin_cell(td):
+    link = next((a for a in td.iter("a") if "/coins/" in (a.get("href") or "")), None)
+    name = _text(link) if link is not None else _text(td)
+    small = next(td.iter("small"), None)
+    return name, _text(small).upper() if small is not None else ""
+
+def iter_rows(page_source, header_map=None):
+    # lxml iterparse over the raw HTML: rows are yielded as soon as their </tr> is
+    # seen and then dropped, so memory stays flat however long the table is.
+    from lxml import etree
+    src = page_source.encode("utf-8") if isinstance(page_source, str) else page_source
+    i = header_map
+    fields = None
+    for _, tr in etree.iterparse(io.BytesIO(src), events=("end",), tag="tr", html=True, recover=True):
+        section = tr.getparent().tag if tr.getparent() is not None else ""
+        if section == "thead":
+            if i is None:
+                i = {}
+                for n, th in enumerate(tr.findall("th")):
+                    lab = norm_header(" ".join(th.itertext()))
+                    if lab: i[lab] = n
+        elif section == "tbody":
+            if fields is None:
+                i = i or {}
+                fields = [(col, i.get(key)) for col, key in ROW_FIELDS]
+            tds = tr.findall("td")
+            if tds:
+                name = symbol = ""
+                if i.get("coin") is not None and i["coin"] < len(tds):
+                    name, symbol = _coin_cell(tds[i["coin"]])
+                row = {col: (_text(tds[idx]) if idx is not None and idx < len(tds) else "") for col, idx in fields}
+                row["Name"], row["Symbol"] = name, symbol
+                yield row
+        tr.clear()
+        while tr.getprevious() is not None: del tr.getparent()[0]
+
 # ======================= Selenium + BS4 =======================
-def scrape_via_bs4(target_total_rows=TARGET_TOTAL_ROWS):
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
+def fetch_page_source(target_total_rows=TARGET_TOTAL_ROWS, pool=None, log=None, url=BASE_URL, start=1):
+    # Loads the table up to rank target_total_rows. start = first rank the caller
+    # needs: when the page opens further down (?page= honoured) only the rows from
+    # its first rank on are loaded, as in scraping_selenium.scrape_page_data.
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
-    from webdriver_manager.chrome import ChromeDriverManager
-    from bs4 import BeautifulSoup
-
-    options = webdriver.ChromeOptions()
-    options.add_argument("--disable-gpu"); options.add_argument("--start-maximized")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    wait = WebDriverWait(driver, 25)
-
-    def click_show_more_until_done():
-        prev=-1
-        while True:
-            count = len(driver.find_elements(By.CSS_SELECTOR, "table tbody tr"))
-            if count >= target_total_rows or count == prev: break
+    SHOW_MORE = (By.XPATH, "//button[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show more')]")
+
+    def click_show_more_until_done(driver, wait, count, target_rows):
+        batch = 0
+        while count < target_rows:
             try:
-                btn = driver.find_element(
-                    By.XPATH,
-                    "//button[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show more')]"
-                )
+                btn = driver.find_element(*SHOW_MORE)
                 driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-                time.sleep(0.5); btn.click(); time.sleep(2.5)
+                wait.until(EC.element_to_be_clickable(SHOW_MORE)).click()
             except: break
-            prev = count
-
-    def norm_header(txt):
-        t = re.sub(r"\s+", " ", (txt or "").strip()).lower()
-        # Normalize all variants to a SINGLE canonical key
-        if "24h" in t and ("vol" in t or "volume" in t):
-            t = "24h volume"
-        t = t.replace("volume (24h)", "24h volume").replace("vol (24h)", "24h volume")
-        t = t.replace("marketcap", "market cap").replace("market capitalization", "market cap")
-        t = t.replace("coin name", "coin")
-        return t
-
-    def get_header_map(soup):
-        mapping={}
-        for i, th in enumerate(soup.select("table thead th")):
-            lab = norm_header(th.get_text())
-            if lab: mapping[lab]=i
-        return mapping
-
-    def safe_text(tds, idx):
-        return tds[idx].get_text(strip=True) if idx is not None and idx < len(tds) else ""
-
-    def extract_rows(soup, i):
-        out=[]
-        for r in soup.select("table tbody tr"):
-            tds = r.find_all("td")
-            if not tds: continue
-            name=symbol=""
-            if i.get("coin") is not None and i["coin"] < len(tds):
-                coin_td = tds[i["coin"]]
-                link = coin_td.select_one("a[href*='/coins/']")
-                name = link.get_text(strip=True) if link else coin_td.get_text(strip=True)
-                small = coin_td.select_one("small")
-                if small: symbol = small.get_text(strip=True).upper()
-            out.append({
-                "Rank": safe_text(tds, i.get("#")),
-                "Name": name,
-                "Symbol": symbol,
-                "Price": safe_text(tds, i.get("price")),
-                "Change_1h": safe_text(tds, i.get("1h")),
-                "Change_24h": safe_text(tds, i.get("24h")),
-                "Change_7d": safe_text(tds, i.get("7d")),
-                "Change_30d": safe_text(tds, i.get("30d")),
-                "Volume_24h": safe_text(tds, i.get("24h volume")),
-                "Circulating_Supply": safe_text(tds, i.get("circulating supply")),
-                "Total_Supply": safe_text(tds, i.get("total supply")),
-                "Market_Cap": safe_text(tds, i.get("market cap")),
-            })
-        return out
-
-    try:
-        driver.get(BASE_URL)
-        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "table tbody tr"))); time.sleep(1)
-        click_show_more_until_done()
-        soup = BeautifulSoup(driver.page_source, "lxml")
-        i = get_header_map(soup)
-        data = extract_rows(soup, i)
-    finally:
-        driver.quit()
-    return ensure_columns(pd.DataFrame(data))
+            t, batch = time.perf_counter(), batch + 1
+            loaded = wait_for_rows(driver, ROWS_CSS, count)
+            if log: log.record(batch, count, loaded, time.perf_counter() - t, LEGACY_SLEEP["batch"])
+            if loaded <= count: break
+            count = loaded
+
+    with (pool or get_pool()).driver() as driver:
+        wait = WebDriverWait(driver, 25)
+        t0 = time.perf_counter()
+        driver.get(url)
+        t = time.perf_counter()
+        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ROWS_CSS)))
+        count = wait_settled(driver, ROWS_CSS)
+        if log: log.record("load", 0, count, time.perf_counter() - t, LEGACY_SLEEP["load"])
+        metrics.request("bs4", "ok", time.perf_counter() - t0, url=url, rows=count)
+        first_rank = 1
+        if start > 1:
+            from scraping_selenium import to_rank
+            first = next(iter_rows(driver.page_source), None)
+            first_rank = min((to_rank(first["Rank"]) if first else None) or 1, start)  # never skip ranks we own
+        click_show_more_until_done(driver, wait, count, target_total_rows - first_rank + 1)
+        return driver.page_source
+
+def scrape_via_bs4(target_total_rows=TARGET_TOTAL_ROWS, pool=None, timer=None):
+    timer = timer or StageTimer("bs4")
+    log = WaitLog("bs4")
+    with timer.stage("fetch"): page_source = fetch_page_source(target_total_rows, pool, log)
+    timer.extra["waits"] = log.summary()
+    with timer.stage("parse"), metrics.PARSE_SECONDS.time(backend="bs4"): df = pd.DataFrame(iter_rows(page_source))
+    with timer.stage("normalize"): return typed_frame(df)
+
+def scrape_via_bs4_job(target_total_rows=TARGET_TOTAL_ROWS, per_page=250, pool=None, timer=None, max_workers=1):
+    # The single long page becomes rank shards (?page=N, as in scraping_selenium),
+    # each parsed and checkpointed as soon as its source is in hand, so a crash
+    # late in the run no longer throws away every row loaded before it.
+    from jobs import run_job
+    from scraping_selenium import shard_range, page_url, merge_shards
+    timer = timer or StageTimer("bs4")
+    pages = range(1, -(-target_total_rows // per_page) + 1)
+    workers = min(max_workers, len(pages))
+    pool = pool or get_pool(size=workers)
+    log = WaitLog("bs4")
+
+    def shard(page):
+        start, end = shard_range(page, per_page, target_total_rows)
+        # Up to rank `end`, from wherever the page opens: all of it if ?page= is ignored
+        source = fetch_page_source(end, pool, log, page_url(page, per_page), start)
+        with metrics.PARSE_SECONDS.time(backend="bs4"): df = pd.DataFrame(iter_rows(source))
+        rank = to_float(df["Rank"]) if len(df) else pd.Series(dtype=float)
+        return ensure_columns(df[rank.isna() | rank.between(start, end)])
+
+    with timer.stage("fetch"):
+        df = run_job("bs4", pages, shard, {"rows": target_total_rows, "per_page": per_page},
+                     combine=merge_shards, max_workers=workers)
+    timer.extra["waits"] = log.summary()
+    with timer.stage("normalize"): return typed_frame(df)
 
 # ======================= Run & Save =======================
 if __name__ == "__main__":
-    method = "bs4"
-
-    df = scrape_via_bs4(TARGET_TOTAL_ROWS)
-    out_name = "coingecko_bs4.csv"
-
-    df.to_csv(out_name, index=False, encoding="utf-8-sig")
-    print(f" {method} → saved {len(df)} rows to {out_name}")
+    # The pre-CLI defaults: stream rows to the file, append to the snapshot store
+    from scrape import main
+    main(["bs4", "--stream", "--store"])
@@ -0,0 +1,116 @@
+import time, requests, pandas as pd
+import metrics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
+from bs4 import BeautifulSoup
+from normalize import to_float, typed_frame
+from timing import StageTimer
+from scraping_bs4 import TARGET_TOTAL_ROWS, BASE_URL, get_header_map, extract_rows, iter_rows
+
+# ---------- Shared config ----------
+MORE_SELECTOR = "[data-action*='more-content#load']"
+URL_ATTRS = ["data-more-content-url-value", "data-more-content-next-url-value", "data-url", "href", "formaction"]
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+}
+
+def make_session(pool_size=8):
+    s = requests.Session()
+    s.headers.update(HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter); s.mount("https://", adapter)
+    return s
+
+# ======================= Endpoint discovery =======================
+def find_more_url(soup, page_url):
+    # The "show more" button is a Stimulus `more-content#load` action; the fragment
+    # URL lives on the button itself or on its `more-content` controller element.
+    btn = soup.select_one(MORE_SELECTOR)
+    if btn is None: return None
+    for el in [btn] + list(btn.parents):
+        if not hasattr(el, "get"): continue
+        for attr in URL_ATTRS:
+            val = el.get(attr)
+            if val and val != "#": return urljoin(page_url, val)
+        if "more-content" in (el.get("data-controller") or ""): break
+    return None
+
+def with_page(url, page):
+    u = urlparse(url)
+    q = {k: v[-1] for k, v in parse_qs(u.query).items()}
+    q["page"] = str(page)
+    return urlunparse(u._replace(query=urlencode(q)))
+
+def page_size(url, default):
+    try: return int(parse_qs(urlparse(url).query)["per_page"][-1])
+    except (KeyError, ValueError): return default
+
+def fragment_html(r):
+    if "json" in r.headers.get("Content-Type", ""):
+        data = r.json()
+        if isinstance(data, dict):
+            return next((v for v in data.values() if isinstance(v, str) and "<tr" in v), "")
+        return ""
+    return r.text
+
+def parse_fragment(html, header_map):
+    if "<table" not in html: html = f"<table><tbody>{html}</tbody></table>"
+    with metrics.PARSE_SECONDS.time(backend="direct"): return list(iter_rows(html, header_map))
+
+def timed_get(session, url, timeout, page):
+    # session.get + raise_for_status, with the latency and status (or "error") recorded
+    t = time.perf_counter()
+    try: r = session.get(url, timeout=timeout)
+    except requests.RequestException as e:
+        metrics.request("direct", "error", time.perf_counter() - t, page=page, error=repr(e)); raise
+    metrics.request("direct", r.status_code, time.perf_counter() - t, page=page)
+    r.raise_for_status()
+    return r
+
+# ======================= Direct HTTP =======================
+def scrape_via_direct(target_total_rows=TARGET_TOTAL_ROWS, url=BASE_URL, max_workers=8, timeout=20, timer=None):
+    timer = timer or StageTimer("direct")
+    session = make_session(max_workers)
+    with timer.stage("fetch"):
+        r = timed_get(session, url, timeout, 1)
+    with timer.stage("parse"), metrics.PARSE_SECONDS.time(backend="direct"):
+        soup = BeautifulSoup(r.text, "lxml")
+        header_map = get_header_map(soup)
+        rows = extract_rows(soup, header_map)
+    print(f"Fetching (direct)… first page → {len(rows)} rows")
+
+    more_url = find_more_url(soup, r.url)
+    if more_url is None:
+        print("  no more-content endpoint found; returning first page only")
+    elif len(rows) < target_total_rows:
+        per_page = page_size(more_url, len(rows) or 50)
+        first_page = int(parse_qs(urlparse(more_url).query).get("page", ["2"])[-1])
+        last_page = -(-target_total_rows // per_page)
+
+        def fetch(page):
+            return fragment_html(timed_get(session, with_page(more_url, page), timeout, page))
+
+        # Fragments are parsed on this thread as they land; the workers only do I/O
+        with timer.stage("fetch"), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, p): p for p in range(first_page, last_page + 1)}
+            for future in as_completed(futures):
+                try: html = future.result()
+                except requests.RequestException as e:
+                    print(f"  fragment page {futures[future]} failed: {e}"); continue
+                with timer.stage("parse"): part = parse_fragment(html, header_map)
+                print(f"  fragment page {futures[future]} → {len(part)} rows")
+                rows.extend(part)
+
+    with timer.stage("normalize"):
+        df = pd.DataFrame(rows)
+        if df.empty: return typed_frame(df)
+        df = df.drop_duplicates(subset=["Rank", "Symbol"])
+        order = to_float(df["Rank"]).sort_values(kind="stable", na_position="last").index
+        return typed_frame(df.loc[order].head(target_total_rows).reset_index(drop=True))
+
+# ======================= Run & Save =======================
+if __name__ == "__main__":
+    # The pre-CLI default: append to the snapshot store
+    from scrape import main
+    main(["direct", "--store"])
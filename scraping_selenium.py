@@ -1,43 +1,82 @@
 import re, time, pandas as pd
+import metrics
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import get_pool
+from normalize import ensure_columns, to_float, typed_frame
+from timing import StageTimer
+from scraping_bs4 import ROW_FIELDS
+from waits import WaitLog, wait_for_rows, wait_settled
 
 # ---------- Shared config ----------
 TARGET_TOTAL_ROWS = 1250
+SHARD_ROWS = 250
 BASE_URL = "https://www.coingecko.com/en/all-cryptocurrencies"
-TARGET_COLUMNS = [
-    "Rank", "Name", "Symbol", "Price", "Change_1h", "Change_24h", "Change_7d", "Change_30d",
-    "Volume_24h", "Circulating_Supply", "Total_Supply", "Market_Cap"
-]
-
-# ---------- format helpers ----------
-def pct_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):.2f}%"
-    except: return str(x)
-
-def money_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"${float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def num_to_str(x):
-    if x is None or x == "": return ""
-    try: return f"{float(x):,.8f}".rstrip("0").rstrip(".")
-    except: return str(x)
-
-def ensure_columns(df):
-    for c in TARGET_COLUMNS:
-        if c not in df.columns: df[c] = ""
-    return df[TARGET_COLUMNS]
+ROWS_CSS = 'tbody[data-more-content-target="content"] tr[data-view-component="true"]'
+# Fixed sleeps the loader used before event-driven waits; only used to report the saving
+LEGACY_SLEEP = {"load": 1.5 + 0.8, "batch": 0.6}
+EXTRACT_CHUNK = 500     # rows serialized per execute_script call; 0 = whole table in one call
+
+# ======================= Sharding =======================
+def shard_range(page_number, per_page=SHARD_ROWS, target_total_rows=TARGET_TOTAL_ROWS):
+    start = (page_number - 1) * per_page + 1
+    return start, min(page_number * per_page, target_total_rows)
+
+def page_url(page_number, per_page=SHARD_ROWS):
+    if page_number <= 1: return BASE_URL
+    return f"{BASE_URL}?page={page_number}&per_page={per_page}"
+
+def to_rank(txt):
+    try: return int(re.sub(r"[^0-9]", "", txt or ""))
+    except ValueError: return None
+
+# ======================= In-browser extraction =======================
+# One execute_script serializes a slice of the table to JSON, replacing a
+# find_elements + .text round trip per row and per cell. innerText matches .text.
+_HEADERS_JS = """
+return Array.from(document.querySelectorAll(arguments[0]), th => th.innerText.trim());
+"""
+
+_ROWS_JS = """
+const [css, coinIdx, start, count] = arguments;
+const text = el => el ? el.innerText.trim() : "";
+return Array.from(document.querySelectorAll(css)).slice(start, start + count).map(tr => {
+  const tds = tr.querySelectorAll("td");
+  const cells = Array.from(tds, text);
+  const coin = coinIdx !== null && coinIdx < tds.length ? tds[coinIdx] : null;
+  if (!coin) return [cells, "", ""];
+  const link = coin.querySelector("a[href*='/coins/']");
+  const sym = coin.querySelector("small") || coin.querySelector("span[class*='coin-item-symbol']");
+  return [cells, link ? text(link) : text(coin), text(sym).toUpperCase()];
+});
+"""
+
+def table_rows(driver, coin_idx, start=0, stop=None, chunk=EXTRACT_CHUNK):
+    # → [(cells, name, symbol)] for rows [start, stop), ceil(rows / chunk) round trips
+    out = []
+    while stop is None or start < stop:
+        n = chunk or 1 << 30
+        if stop is not None: n = min(n, stop - start)
+        part = driver.execute_script(_ROWS_JS, ROWS_CSS, coin_idx, start, n)
+        out.extend(part); start += len(part)
+        if len(part) < n: break
+    return out
+
+def to_record(cells, name, symbol, fields):
+    # Header map applied here, not in the browser: fields = [(column, cell index)]
+    row = {col: (cells[idx] if idx is not None and idx < len(cells) else "") for col, idx in fields}
+    row["Name"], row["Symbol"] = name, symbol
+    return row
 
 # ======================= Selenium (direct) =======================
-def scrape_page_data(page_number, target_total_rows=TARGET_TOTAL_ROWS):
+def scrape_page_data(page_number, per_page=SHARD_ROWS, target_total_rows=TARGET_TOTAL_ROWS, pool=None, log=None, chunk=EXTRACT_CHUNK):
+    # Scrapes ranks [start, end] of the table. The page is opened at its paged
+    # URL; if the site ignores the page parameter (first rank <= start) we fall
+    # back to "show more" until `end` is loaded and keep only our slice.
+    start, end = shard_range(page_number, per_page, target_total_rows)
+
     def norm_header(txt):
         t = re.sub(r"\s+"," ",(txt or "").strip()).lower()
         t = t.replace("volume (24h)","24h volume").replace("vol (24h)","24h volume")
@@ -47,15 +86,15 @@ def scrape_page_data(page_number, target_total_rows=TARGET_TOTAL_ROWS):
         return t
 
     def get_header_map(driver):
-        ths = driver.find_elements(By.CSS_SELECTOR, 'table[data-view-component="true"] thead th')
+        labels = driver.execute_script(_HEADERS_JS, 'table[data-view-component="true"] thead th')
         mapping = {}
-        for i, th in enumerate(ths):
-            lab = norm_header(th.text)
+        for i, txt in enumerate(labels):
+            lab = norm_header(txt)
             if lab: mapping[lab] = i
         return mapping
 
     def count_rows(driver):
-        return len(driver.find_elements(By.CSS_SELECTOR, 'tbody[data-more-content-target="content"] tr[data-view-component="true"]'))
+        return len(driver.find_elements(By.CSS_SELECTOR, ROWS_CSS))
 
     SHOW_MORE = [
         (By.XPATH, "//button[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'show more')]"),
@@ -80,73 +119,89 @@ def scrape_page_data(page_number, target_total_rows=TARGET_TOTAL_ROWS):
         return True
 
     def load_until_rows(driver, wait, target_rows, max_tries=100):
-        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'tbody[data-more-content-target="content"] tr[data-view-component="true"]')))
-        time.sleep(0.8); prev=-1; tries=0
-        while tries < max_tries:
-            current = count_rows(driver)
-            if current >= target_rows or current == prev: break
+        current = count_rows(driver); tries=0
+        while tries < max_tries and current < target_rows:
             if not click_show_more(driver, wait): break
-            WebDriverWait(driver, 20).until(lambda d: count_rows(d) > current)
-            time.sleep(0.6); prev=current; tries+=1
-
-    def safe_cell_text(tds, idx):
-        try: return tds[idx].text.strip()
-        except: return ""
-
-    options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized"); options.add_argument("--disable-gpu")
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    wait = WebDriverWait(driver, 25)
-
-    try:
-        driver.get(BASE_URL); time.sleep(1.5)
-        header_map = get_header_map(driver)
-        load_until_rows(driver, wait, target_total_rows)
-        rows = driver.find_elements(By.CSS_SELECTOR, 'tbody[data-more-content-target="content"] tr[data-view-component="true"]')
-        i = header_map; out=[]
-        for r in rows:
-            tds = r.find_elements(By.TAG_NAME, "td")
-            if not tds: continue
-            name=symbol=""
-            if i.get("coin") is not None and i["coin"] < len(tds):
-                coin_td = tds[i["coin"]]
-                try: name = coin_td.find_element(By.CSS_SELECTOR, "a[href*='/coins/']").text.strip()
-                except: name = coin_td.text.strip()
-                try: symbol = coin_td.find_element(By.TAG_NAME, "small").text.strip().upper()
-                except:
-                    try: symbol = coin_td.find_element(By.CSS_SELECTOR,"span[class*='coin-item-symbol']").text.strip().upper()
-                    except: symbol=""
-            out.append({
-                "Rank": safe_cell_text(tds, i.get("#")),
-                "Name": name,
-                "Symbol": symbol,
-                "Price": safe_cell_text(tds, i.get("price")),
-                "Change_1h": safe_cell_text(tds, i.get("1h")),
-                "Change_24h": safe_cell_text(tds, i.get("24h")),
-                "Change_7d": safe_cell_text(tds, i.get("7d")),
-                "Change_30d": safe_cell_text(tds, i.get("30d")),
-                "Volume_24h": safe_cell_text(tds, i.get("24h volume")),
-                "Circulating_Supply": safe_cell_text(tds, i.get("circulating supply")),
-                "Total_Supply": safe_cell_text(tds, i.get("total supply")),
-                "Market_Cap": safe_cell_text(tds, i.get("market cap")),
-            })
-    finally:
-        driver.quit()
+            t = time.perf_counter()
+            loaded = wait_for_rows(driver, ROWS_CSS, current)
+            if log: log.record(f"shard {page_number}", current, loaded, time.perf_counter() - t, LEGACY_SLEEP["batch"])
+            if loaded <= current: break
+            current = loaded; tries+=1
+
+    with (pool or get_pool()).driver() as driver:
+        wait = WebDriverWait(driver, 25)
+        t0 = time.perf_counter()
+        driver.get(page_url(page_number, per_page))
+        t = time.perf_counter()
+        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ROWS_CSS)))
+        n = wait_settled(driver, ROWS_CSS)
+        if log: log.record(f"shard {page_number} load", 0, n, time.perf_counter() - t, LEGACY_SLEEP["load"])
+        metrics.request("selenium", "ok", time.perf_counter() - t0, page=page_number, rows=n)
+        i = get_header_map(driver)
+        fields = [(col, i.get(key)) for col, key in ROW_FIELDS]
+        first = table_rows(driver, i.get("coin"), 0, 1)
+        first_rank = (to_rank(to_record(*first[0], fields)["Rank"]) if first else None) or 1
+        if first_rank > start: first_rank = start  # never skip ranks we own
+        load_until_rows(driver, wait, end - first_rank + 1)
+        offset = start - first_rank               # rows above our slice stay in the browser
+        out = []
+        with metrics.PARSE_SECONDS.time(backend="selenium"):
+            for cells, name, symbol in table_rows(driver, i.get("coin"), offset, offset + end - start + 1, chunk=chunk):
+                if not cells: continue
+                row = to_record(cells, name, symbol, fields)
+                rank = to_rank(row["Rank"])
+                if rank is not None and not (start <= rank <= end): continue
+                out.append(row)
     return ensure_columns(pd.DataFrame(out))
 
 # ======================= Multithreading =======================
-def scrape_via_selenium_multithreaded(target_total_rows=TARGET_TOTAL_ROWS):
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(scrape_page_data, page) for page in range(1, (target_total_rows // 250) + 1)]
-        result = []
+def merge_shards(frames):
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames: return ensure_columns(pd.DataFrame())
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset=["Rank", "Symbol"])
+    order = to_float(df["Rank"]).sort_values(kind="stable", na_position="last").index
+    return ensure_columns(df.loc[order].reset_index(drop=True))
+
+def scrape_shards(target_total_rows=TARGET_TOTAL_ROWS, max_workers=5, per_page=SHARD_ROWS, pool=None, log=None):
+    pages = range(1, -(-target_total_rows // per_page) + 1)
+    workers = min(max_workers, len(pages))
+    pool = pool or get_pool(size=workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(scrape_page_data, page, per_page, target_total_rows, pool, log): page for page in pages}
+        frames = []
         for future in as_completed(futures):
-            result.extend(future.result())
-    return pd.DataFrame(result)
+            df = future.result()
+            print(f"  shard {futures[future]} → {len(df)} rows")
+            frames.append(df)
+    return frames
+
+def scrape_via_selenium_multithreaded(target_total_rows=TARGET_TOTAL_ROWS, max_workers=5, per_page=SHARD_ROWS, pool=None, timer=None):
+    timer = timer or StageTimer("selenium")
+    log = WaitLog("selenium")
+    # Cell reads happen in the browser workers, so "fetch" covers load + DOM extraction
+    with timer.stage("fetch"): frames = scrape_shards(target_total_rows, max_workers, per_page, pool, log)
+    timer.extra["waits"] = log.summary()
+    with timer.stage("parse"): df = merge_shards(frames)
+    with timer.stage("normalize"): return typed_frame(df)
+
+def scrape_via_selenium_job(target_total_rows=TARGET_TOTAL_ROWS, max_workers=5, per_page=SHARD_ROWS, pool=None, timer=None):
+    # Same shards, but each one is checkpointed as it finishes; after a browser
+    # crash the rerun only scrapes the rank ranges that are missing.
+    from jobs import run_job
+    timer = timer or StageTimer("selenium")
+    pages = range(1, -(-target_total_rows // per_page) + 1)
+    workers = min(max_workers, len(pages))
+    pool = pool or get_pool(size=workers)
+    log = WaitLog("selenium")
+    with timer.stage("fetch"):
+        df = run_job("selenium", pages, lambda p: scrape_page_data(p, per_page, target_total_rows, pool, log),
+                     {"rows": target_total_rows, "per_page": per_page}, combine=merge_shards, max_workers=workers)
+    timer.extra["waits"] = log.summary()
+    with timer.stage("normalize"): return typed_frame(df)
 
 # ======================= Run & Save =======================
 if __name__ == "__main__":
-    method = "selenium_multithreaded"
-    df = scrape_via_selenium_multithreaded(TARGET_TOTAL_ROWS)
-    out_name = "coingecko_selenium_multithreaded.csv"
-    df.to_csv(out_name, index=False, encoding="utf-8-sig")
-    print(f" {method} → saved {len(df)} rows to {out_name}")
+    # The pre-CLI defaults: 5 workers, append to the snapshot store
+    from scrape import main
+    main(["selenium", "--concurrency", "5", "--store"])
@@ -0,0 +1,89 @@
+import os, uuid, pandas as pd
+import pyarrow as pa, pyarrow.dataset as ds, pyarrow.parquet as pq
+from datetime import datetime, timedelta, timezone
+from normalize import typed_frame, compact_frame
+from output import arrow_schema
+
+# ---------- Shared config ----------
+STORE_DIR = "snapshots"
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+def store_schema():
+    return arrow_schema().append(pa.field("scrape_time", pa.timestamp("us", tz="UTC"))).append(pa.field("source", pa.string()))
+
+def as_utc(t):
+    t = pd.Timestamp(t)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+# ======================= Snapshot store =======================
+class SnapshotStore:
+    # One Parquet file per scrape under <root>/date=YYYY-MM-DD/. Rows are keyed by
+    # (Symbol, scrape_time); files are never rewritten, so appends are O(snapshot)
+    # and reads prune whole days by directory and row groups by column stats.
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def append(self, df, scrape_time=None, source=""):
+        t = as_utc(scrape_time or datetime.now(timezone.utc)).floor("s")
+        out = typed_frame(df).sort_values("Symbol", kind="stable")
+        out["scrape_time"] = t; out["source"] = source
+        table = pa.Table.from_pandas(out, schema=store_schema(), preserve_index=False)
+        part = os.path.join(self.root, f"date={t:%Y-%m-%d}")
+        os.makedirs(part, exist_ok=True)
+        path = os.path.join(part, f"part-{t:%H%M%S}-{source or 'scrape'}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(table, path, compression="zstd", row_group_size=2048)
+        return path
+
+    def dataset(self):
+        if not os.path.isdir(self.root): return None
+        return ds.dataset(self.root, format="parquet", partitioning=PARTITIONING, schema=store_schema().append(pa.field("date", pa.string())))
+
+    def read(self, symbols=None, start=None, end=None, max_rank=None, source=None, columns=None, compact=False):
+        dset = self.dataset()
+        if dset is None: return pd.DataFrame(columns=store_schema().names)
+        f = None
+        def add(expr):
+            nonlocal f
+            f = expr if f is None else f & expr
+        if start is not None:
+            start = as_utc(start); add(ds.field("date") >= f"{start:%Y-%m-%d}"); add(ds.field("scrape_time") >= start)
+        if end is not None:
+            end = as_utc(end); add(ds.field("date") <= f"{end:%Y-%m-%d}"); add(ds.field("scrape_time") <= end)
+        if symbols is not None:
+            symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+            add(ds.field("Symbol").isin([s.upper() for s in symbols]))
+        if max_rank is not None: add(ds.field("Rank") <= max_rank)
+        if source is not None: add(ds.field("source") == source)
+        cols = columns or store_schema().names
+        df = dset.to_table(columns=cols, filter=f).to_pandas()
+        return compact_frame(df) if compact else df
+
+    def dates(self):
+        if not os.path.isdir(self.root): return []
+        return sorted(d[5:] for d in os.listdir(self.root) if d.startswith("date="))
+
+    def scrape_times(self, end=None, source=None):
+        df = self.read(end=end, source=source, columns=["scrape_time"])
+        return sorted(df["scrape_time"].unique())
+
+    def latest_time(self, at=None, source=None):
+        # Walk day partitions backwards and stop at the first one with a snapshot <= at
+        at = as_utc(at or datetime.now(timezone.utc))
+        for day in reversed([d for d in self.dates() if d <= f"{at:%Y-%m-%d}"]):
+            day_start = pd.Timestamp(day, tz="UTC")
+            times = self.read(start=day_start, end=min(at, day_start + timedelta(days=1) - timedelta(microseconds=1)),
+                              source=source, columns=["scrape_time"])["scrape_time"]
+            if len(times): return times.max()
+        return None
+
+    # ---------- common queries ----------
+    def history(self, symbol, days=30, end=None):
+        end = as_utc(end or datetime.now(timezone.utc))
+        df = self.read(symbols=[symbol], start=end - timedelta(days=days), end=end)
+        return df.sort_values("scrape_time").reset_index(drop=True)
+
+    def top_at(self, at=None, n=100, source=None):
+        t = self.latest_time(at, source)
+        if t is None: return pd.DataFrame(columns=store_schema().names)
+        df = self.read(start=t, end=t, max_rank=n, source=source)
+        return df.sort_values("Rank").reset_index(drop=True)
@@ -0,0 +1,132 @@
+import json, random, hashlib, threading, time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# ---------- Local CoinGecko stand-in (offline runs / benchmarks) ----------
+MARKETS_PATH = "/api/v3/coins/markets"
+PAGE_PATH = "/en/all-cryptocurrencies"
+FRAGMENT_PATH = "/en/all-cryptocurrencies/show_more_coins"
+FIRST_PAGE_ROWS = 50
+HEADERS = ["#", "Coin", "Price", "1h", "24h", "7d", "30d", "24h Volume",
+           "Circulating Supply", "Total Supply", "Market Cap"]
+
+def fake_coin(rank, seed=0):
+    rnd = random.Random(seed * 100003 + rank)
+    price = round(10 ** rnd.uniform(-6, 5), 8)
+    supply = round(10 ** rnd.uniform(5, 12), 2)
+    return {
+        "id": f"coin-{rank}", "symbol": f"c{rank}", "name": f"Coin {rank}",
+        "current_price": price, "market_cap": round(price * supply, 2),
+        "market_cap_rank": rank, "total_volume": round(price * supply * rnd.uniform(0.001, 0.3), 2),
+        "circulating_supply": supply, "total_supply": round(supply * rnd.uniform(1, 2), 2),
+        "price_change_percentage_1h_in_currency": rnd.uniform(-3, 3),
+        "price_change_percentage_24h_in_currency": rnd.uniform(-15, 15),
+        "price_change_percentage_7d_in_currency": rnd.uniform(-30, 30),
+        "price_change_percentage_30d_in_currency": rnd.uniform(-60, 60),
+    }
+
+# ---------- HTML rendering (mirrors the all-cryptocurrencies table markup) ----------
+def _short(x):
+    for div, suf in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(x) >= div: return f"{x / div:.2f}{suf}"
+    return f"{x:,.2f}"
+
+def _fmt(v, spec, prefix="", suffix=""):
+    if v is None or v != v: return ""          # None / NaN → blank cell, like the site
+    return f"{prefix}{v:{spec}}{suffix}"
+
+def render_row(coin):
+    g = coin.get
+    price = _fmt(g("current_price"), ",.8f", "$")
+    cells = [
+        str(g("market_cap_rank") or ""),
+        f'<a href="/en/coins/{escape(g("id") or "")}"><span>{escape(g("name") or "")}</span></a> <small>{escape((g("symbol") or "").upper())}</small>',
+        price.rstrip("0").rstrip(".") if "." in price else price,
+        _fmt(g("price_change_percentage_1h_in_currency"), ".1f", suffix="%"),
+        _fmt(g("price_change_percentage_24h_in_currency"), ".1f", suffix="%"),
+        _fmt(g("price_change_percentage_7d_in_currency"), ".1f", suffix="%"),
+        _fmt(g("price_change_percentage_30d_in_currency"), ".1f", suffix="%"),
+        _fmt(g("total_volume"), ",.0f", "$"),
+        _fmt(g("circulating_supply"), ",.0f"),
+        _short(g("total_supply")) if g("total_supply") is not None and g("total_supply") == g("total_supply") else "",
+        _fmt(g("market_cap"), ",.0f", "$"),
+    ]
+    return '<tr data-view-component="true">' + "".join(f"<td>{c}</td>" for c in cells) + "</tr>"
+
+def coin_at(rank, seed=0, coins=None):
+    return coins[rank - 1] if coins else fake_coin(rank, seed)
+
+def render_rows(start, stop, seed=0, coins=None):
+    return "\n".join(render_row(coin_at(r, seed, coins)) for r in range(start, stop))
+
+def render_page(total_coins, first_rows=FIRST_PAGE_ROWS, seed=0, coins=None):
+    head = "".join(f"<th>{h}</th>" for h in HEADERS)
+    more = f"{FRAGMENT_PATH}?page=2&amp;per_page={first_rows}"
+    return (
+        "<!DOCTYPE html><html><head><title>All Cryptocurrencies</title></head><body>"
+        '<div data-controller="more-content">'
+        f'<table data-view-component="true"><thead><tr>{head}</tr></thead>'
+        f'<tbody data-more-content-target="content">{render_rows(1, min(first_rows, total_coins) + 1, seed, coins)}</tbody></table>'
+        f'<button data-action="click->more-content#load" data-more-content-url-value="{more}">Show More</button>'
+        "</div></body></html>"
+    )
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+    def send_body(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.hits += 1; hit = srv.hits
+        if srv.latency: time.sleep(srv.latency)
+        url = urlparse(self.path)
+        if url.path not in (MARKETS_PATH, PAGE_PATH, FRAGMENT_PATH):
+            return self.send_body(404, b'{"error":"not found"}')
+        if srv.rate_limit_every and hit % srv.rate_limit_every == 0:
+            return self.send_body(429, b'{"status":{"error_code":429}}',
+                                  headers={"Retry-After": str(srv.retry_after)})
+        q = parse_qs(url.query)
+        if url.path == PAGE_PATH:
+            return self.send_body(200, render_page(srv.total_coins, seed=srv.seed, coins=srv.coins).encode(), "text/html; charset=utf-8")
+        page = int(q.get("page", ["1"])[0]); per_page = int(q.get("per_page", ["100"])[0])
+        start = (page - 1) * per_page + 1
+        stop = min(start + per_page, srv.total_coins + 1)
+        if url.path == FRAGMENT_PATH:
+            return self.send_body(200, render_rows(start, stop, srv.seed, srv.coins).encode(), "text/html; charset=utf-8")
+        data = [coin_at(r, srv.seed, srv.coins) for r in range(start, stop)]
+        body = json.dumps(data).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304); self.send_header("ETag", etag); self.end_headers(); return
+        self.send_body(200, body, headers={"ETag": etag, "Last-Modified": srv.last_modified})
+
+def start_stub_server(port=0, total_coins=1250, latency=0.0, rate_limit_every=0, retry_after=1, seed=0, coins=None):
+    # coins: recorded API-shaped dicts (see benchmarks/fixtures.py) instead of generated ones
+    srv = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock(); srv.hits = 0
+    srv.coins = coins
+    srv.total_coins = len(coins) if coins else total_coins
+    srv.latency, srv.seed = latency, seed
+    srv.rate_limit_every, srv.retry_after = rate_limit_every, retry_after
+    srv.last_modified = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime())
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+# ======================= Run =======================
+if __name__ == "__main__":
+    srv, base = start_stub_server(port=8765, latency=0.2, rate_limit_every=7)
+    print(f" stub → {base}{MARKETS_PATH} and {base}{PAGE_PATH}  (Ctrl+C to stop)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
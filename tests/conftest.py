@@ -0,0 +1,17 @@
+import os, sys, pytest
+
+# The modules live flat in the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import start_stub_server
+
+@pytest.fixture
+def stub():
+    # Factory: stub(total_coins=…, rate_limit_every=…) → (server, base URL); all stopped afterwards
+    servers = []
+    def start(**kwargs):
+        srv, base = start_stub_server(**kwargs)
+        servers.append(srv)
+        return srv, base
+    yield start
+    for srv in servers: srv.shutdown(); srv.server_close()
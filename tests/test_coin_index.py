@@ -0,0 +1,16 @@
+import pandas as pd
+from coin_index import CoinIndex
+
+# ======================= Provisional keys =======================
+def test_glued_names_keep_their_key_once_confirmed(tmp_path):
+    # A bs4-only index keys every row on its raw name; indexing the API later
+    # confirms the split in place instead of handing out a second key
+    ix = CoinIndex()
+    bs4 = pd.DataFrame({"Name": ["BitcoinBTC", "Shiba InuSHIB", "OnlyHereONLY"]})
+    first = ix.canonical(bs4)["Coin_Key"].tolist()
+    assert min(first) >= 0 and ix.provisional(first).all()
+    ix.canonical(pd.DataFrame({"Name": ["Bitcoin", "Shiba Inu"], "Symbol": ["BTC", "SHIB"]}))
+    again = CoinIndex.load(ix.save(str(tmp_path / "index.json"))).canonical(bs4)
+    assert again["Coin_Key"].tolist() == first
+    assert ix.provisional(first).tolist() == [False, False, True]
+    assert ix.lookup("BTC", "Bitcoin") == first[0] and ix.lookup(name="OnlyHereONLY") is None
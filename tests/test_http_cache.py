@@ -0,0 +1,60 @@
+import os
+from http_cache import CachedSession
+from stub_server import MARKETS_PATH
+
+def page(n, per_page=20): return {"page": n, "per_page": per_page}
+
+# ======================= Conditional requests =======================
+def test_fresh_entries_skip_the_network(stub, tmp_path):
+    srv, base = stub()
+    s = CachedSession(tmp_path, ttl=300)
+    first, second = s.get(base + MARKETS_PATH, params=page(1)), s.get(base + MARKETS_PATH, params=page(1))
+    assert srv.hits == 1 and second.from_cache and second.content == first.content
+    assert s.stats == {"fresh": 1, "revalidated": 0, "downloaded": 1, "offline_miss": 0}
+
+def test_stale_entries_revalidate_with_etag(stub, tmp_path):
+    srv, base = stub()
+    s = CachedSession(tmp_path, ttl=0)
+    first = s.get(base + MARKETS_PATH, params=page(1))
+    assert first.status_code == 200 and first.headers["ETag"]
+    second = s.get(base + MARKETS_PATH, params=page(1))       # 304 from the stub → body from disk
+    assert srv.hits == 2 and second.status_code == 200 and second.from_cache
+    assert second.json() == first.json()
+    assert s.stats["revalidated"] == 1 and s.stats["downloaded"] == 1
+
+def test_missing_body_is_refetched_not_a_bare_304(stub, tmp_path):
+    # Another process sharing the dir evicted the body but this session's index
+    # still has the ETag: the request must go out unconditionally
+    srv, base = stub()
+    s = CachedSession(tmp_path, ttl=0)
+    first = s.get(base + MARKETS_PATH, params=page(1))
+    os.remove(s._body_path(s.key(base + MARKETS_PATH, page(1))))
+    again = s.get(base + MARKETS_PATH, params=page(1))
+    assert again.status_code == 200 and again.content == first.content
+    assert s.stats["downloaded"] == 2 and s.stats["revalidated"] == 0
+    assert s.get(base + MARKETS_PATH, params=page(1)).from_cache      # and it is cached again
+
+# ======================= Offline replay =======================
+def test_offline_replays_the_cache_without_network(stub, tmp_path):
+    srv, base = stub()
+    online = CachedSession(tmp_path, ttl=0).get(base + MARKETS_PATH, params=page(1))
+    offline = CachedSession(tmp_path, ttl=0, offline=True)        # a new session reloads index.json
+    replay = offline.get(base + MARKETS_PATH, params=page(1))
+    miss = offline.get(base + MARKETS_PATH, params=page(2))
+    assert srv.hits == 1
+    assert replay.from_cache and replay.content == online.content
+    assert miss.status_code == 504 and offline.stats["offline_miss"] == 1
+
+# ======================= LRU eviction =======================
+def test_least_recently_used_body_is_evicted(stub, tmp_path):
+    _, base = stub()
+    sizes = [len(CachedSession(tmp_path / "probe").get(base + MARKETS_PATH, params=page(n)).content) for n in (1, 2, 3)]
+    # Room for any two bodies, not three
+    s = CachedSession(tmp_path / "lru", ttl=300, max_bytes=sum(sizes) - min(sizes) // 2)
+    for n in (1, 2): s.get(base + MARKETS_PATH, params=page(n))
+    s.get(base + MARKETS_PATH, params=page(1))                     # touch 1 → 2 is now least recent
+    s.get(base + MARKETS_PATH, params=page(3))
+    kept = {s.key(base + MARKETS_PATH, page(n)) for n in (1, 3)}
+    assert set(s.index) == kept
+    assert not os.path.exists(s._body_path(s.key(base + MARKETS_PATH, page(2))))
+    assert sum(e["size"] for e in s.index.values()) <= s.max_bytes
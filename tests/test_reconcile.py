@@ -0,0 +1,31 @@
+import pandas as pd
+from coin_index import CoinIndex
+from normalize import NUMERIC_COLUMNS
+from reconcile import reconcile
+
+def frame(names, symbols=None):
+    n = len(names)
+    df = pd.DataFrame({c: [100.0 / (i + 1) for i in range(n)] for c in NUMERIC_COLUMNS})
+    return df.assign(Rank=range(1, n + 1), Name=names, Symbol=symbols or [""] * n, Id="")
+
+API = frame(["Bitcoin", "Shiba Inu", "USDC"], ["BTC", "SHIB", "USDC"])
+BS4 = frame(["BitcoinBTC", "Shiba InuSHIB", "USDCUSDC"])
+SELENIUM = frame(["Bitcoin BTC", "Shiba Inu SHIB", "USDC USDC"])
+
+def run(frames):
+    best, _, discrepancies, summary = reconcile(frames, CoinIndex())
+    return best.drop(columns="Coin_Key").reset_index(drop=True), summary.set_index("source").sort_index(), discrepancies
+
+# ======================= Alignment =======================
+def test_frame_order_does_not_matter():
+    best, summary, _ = run({"api": API, "bs4": BS4, "selenium": SELENIUM})
+    best2, summary2, _ = run({"bs4": BS4, "selenium": SELENIUM, "api": API})
+    pd.testing.assert_frame_equal(best, best2)
+    pd.testing.assert_frame_equal(summary, summary2)
+    assert len(best) == 3 and (summary["coverage"] == 1).all()
+    assert best["Symbol"].tolist() == ["BTC", "SHIB", "USDC"]
+
+def test_glued_sources_align_without_an_api_snapshot():
+    best, summary, discrepancies = run({"bs4": BS4, "selenium": SELENIUM})
+    assert len(best) == 3 and (summary["coverage"] == 1).all() and discrepancies.empty
+    assert best["Symbol"].tolist() == ["", "", ""]                 # unconfirmed: names stay as scraped
@@ -0,0 +1,19 @@
+import os, pytest
+from scrape import ScrapeConfig, parse_args, run
+from stub_server import MARKETS_PATH
+
+# ======================= Cache replays =======================
+def test_offline_rejects_store_and_delta():
+    for flag in ("--store", "--delta"):
+        with pytest.raises(SystemExit): parse_args(["api", "--cache", "--offline", flag])
+
+def test_cached_replay_is_not_stored_again(stub, tmp_path, monkeypatch):
+    # Second run inside the TTL never reaches the server: same bytes, no new snapshot/delta
+    monkeypatch.chdir(tmp_path)
+    srv, base = stub()
+    cfg = ScrapeConfig(rows=40, concurrency=1, url=base + MARKETS_PATH, cache=True, store_snapshot=True, delta=True)
+    first, _ = run("api", cfg)
+    second, _ = run("api", cfg)
+    assert srv.hits == 1 and len(first) == len(second) == 40 and second.attrs["from_cache"]
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "snapshots")) == 1
+    with open(tmp_path / "deltas" / "api" / "manifest.jsonl") as f: assert len(f.readlines()) == 1
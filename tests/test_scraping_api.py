@@ -0,0 +1,67 @@
+import socket, threading, time
+import scraping_api
+from scraping_api import TokenBucket, backoff_delay, fetch_via_api, fetch_via_api_async, parse_retry_after
+from stub_server import MARKETS_PATH
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+# ======================= Retry-After / backoff =======================
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) == 60.0 and parse_retry_after("soon", default=5) == 5
+    future = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < parse_retry_after(future) <= 30
+
+def test_backoff_delay_is_full_jitter_capped():
+    for attempt in range(10):
+        d = backoff_delay(attempt, base=1.0, cap=8.0)
+        assert 0 <= d <= min(8.0, 2 ** attempt)
+
+# ======================= Async fetcher against the stub =======================
+def test_async_pauses_all_requests_on_429(stub, monkeypatch):
+    # Every 3rd request is a 429 with Retry-After: 0.3 → the bucket is paused for that
+    # long and the page is retried; no page is lost
+    srv, base = stub(total_coins=500, rate_limit_every=3, retry_after=0.3)
+    pauses = []
+    pause = TokenBucket.pause
+    monkeypatch.setattr(TokenBucket, "pause", lambda self, s: (pauses.append(s), pause(self, s)))
+    t = time.perf_counter()
+    df = fetch_via_api_async(max_pages=5, per_page=100, url=base + MARKETS_PATH, concurrency=3, rate=50, burst=3)
+    assert len(df) == 500 and df["Rank"].tolist() == list(range(1, 501))
+    assert pauses and all(p == 0.3 for p in pauses)
+    assert srv.hits == 5 + len(pauses)
+    assert time.perf_counter() - t >= 0.3
+
+def test_async_backs_off_then_gives_up_on_network_errors(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scraping_api, "backoff_delay", lambda attempt: delays.append(attempt) or 0.0)
+    df = fetch_via_api_async(max_pages=1, per_page=10, url=f"http://127.0.0.1:{free_port()}{MARKETS_PATH}", rate=100, timeout=2)
+    assert df.empty
+    assert delays == [0, 1, 2, 3, 4]     # max_retries=5: growing attempts, none after the last
+
+def test_async_retries_dropped_connections(monkeypatch):
+    # A server that accepts and immediately hangs up → aiohttp.ServerDisconnectedError,
+    # which is not an OSError; it must be retried like any other network error
+    srv = socket.socket(); srv.bind(("127.0.0.1", 0)); srv.listen(16)
+    accepted = []
+    def hang_up():
+        while True:
+            try: conn, _ = srv.accept()
+            except OSError: return
+            accepted.append(1); conn.close()
+    threading.Thread(target=hang_up, daemon=True).start()
+    delays = []
+    monkeypatch.setattr(scraping_api, "backoff_delay", lambda attempt: delays.append(attempt) or 0.0)
+    try:
+        df = fetch_via_api_async(max_pages=2, per_page=10, url=f"http://127.0.0.1:{srv.getsockname()[1]}{MARKETS_PATH}", rate=100, timeout=5)
+    finally: srv.close()
+    assert df.empty and len(accepted) >= 6
+    assert sorted(delays) == sorted([0, 1, 2, 3, 4] * 2)     # both pages backed off to the end
+
+def test_serial_and_async_agree(stub):
+    _, base = stub(total_coins=300)
+    a = fetch_via_api(max_pages=2, per_page=150, url=base + MARKETS_PATH)
+    b = fetch_via_api_async(max_pages=2, per_page=150, url=base + MARKETS_PATH, rate=50)
+    assert a.equals(b) and len(a) == 300 and a["Id"].iloc[0] == "coin-1"
@@ -0,0 +1,36 @@
+from urllib.parse import urlparse, parse_qs
+from bs4 import BeautifulSoup
+from scraping_direct import find_more_url, scrape_via_direct, with_page
+from stub_server import FIRST_PAGE_ROWS, FRAGMENT_PATH, PAGE_PATH, fake_coin, render_page
+
+# ======================= Endpoint discovery =======================
+def test_finds_the_show_more_fragment_url():
+    soup = BeautifulSoup(render_page(200), "lxml")
+    url = find_more_url(soup, "http://example.test" + PAGE_PATH)
+    u = urlparse(url)
+    assert u.netloc == "example.test" and u.path == FRAGMENT_PATH
+    assert parse_qs(u.query) == {"page": ["2"], "per_page": [str(FIRST_PAGE_ROWS)]}
+    assert parse_qs(urlparse(with_page(url, 7)).query)["page"] == ["7"]
+
+def test_no_button_means_no_fragment_url():
+    assert find_more_url(BeautifulSoup("<table><tbody></tbody></table>", "lxml"), "http://example.test/") is None
+
+# ======================= Fetch + merge =======================
+def test_merges_first_page_and_fragments_in_rank_order(stub):
+    srv, base = stub(total_coins=400)
+    df = scrape_via_direct(330, base + PAGE_PATH, max_workers=4)
+    assert df["Rank"].tolist() == list(range(1, 331))
+    assert srv.hits == 1 + 6                                        # page + fragments 2..7 of 50 rows
+    coin = fake_coin(123)
+    row = df.iloc[122]
+    assert (row["Name"], row["Symbol"]) == (coin["name"], coin["symbol"].upper())
+    assert abs(row["Price"] - coin["current_price"]) <= 1e-8 + 1e-9 * coin["current_price"]     # page shows 8 decimals
+
+def test_short_table_returns_what_exists(stub):
+    _, base = stub(total_coins=120)
+    df = scrape_via_direct(500, base + PAGE_PATH, max_workers=4)
+    assert df["Rank"].tolist() == list(range(1, 121))
+
+def test_first_page_only_when_target_fits(stub):
+    srv, base = stub(total_coins=400)
+    assert len(scrape_via_direct(FIRST_PAGE_ROWS, base + PAGE_PATH)) == FIRST_PAGE_ROWS and srv.hits == 1
@@ -0,0 +1,37 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# ======================= Stage timing =======================
+class StageTimer:
+    # Wall time per named stage. Stages may nest; a parent is charged only for the
+    # time not spent in its children, so the stages always add up to the total.
+    def __init__(self, name=""):
+        self.name = name
+        self.seconds = defaultdict(float)
+        self.rows = 0
+        self.extra = {}             # backend-specific detail merged into the report (e.g. waits)
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter(); self._stack.append(0.0)
+        try: yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.seconds[name] += elapsed - self._stack.pop()
+            if self._stack: self._stack[-1] += elapsed
+
+    def report(self):
+        total = sum(self.seconds.values())
+        return {"backend": self.name, "rows": self.rows, "total_s": round(total, 4),
+                "rows_per_s": round(self.rows / total, 1) if total else None,
+                "stages": {k: round(v, 4) for k, v in self.seconds.items()}, **self.extra}
+
+def format_report(r):
+    stages = "  ".join(f"{k} {v:.2f}s" for k, v in r["stages"].items())
+    line = f"{r['backend']:>9}: {r['rows']} rows in {r['total_s']:.2f}s ({r['rows_per_s'] or 0:,.0f} rows/s)  [{stages}]"
+    if "waits" in r:
+        w = r["waits"]
+        line += f"\n{'':>11}waits: {w['batches']} batches, {w['wait_s']:.2f}s waited, {w['saved_s']:.2f}s saved vs fixed sleeps"
+    return line
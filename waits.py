@@ -0,0 +1,64 @@
+import threading
+import metrics
+
+# ---------- Shared config ----------
+BATCH_TIMEOUT = 10      # seconds for a "show more" batch to land before we call it done
+SETTLE_MS = 250         # DOM counts as settled after this long without mutations
+SETTLE_TIMEOUT = 5
+
+# Both scripts run via execute_async_script: a MutationObserver on <body> calls back
+# the moment the DOM changes, so we return as soon as rows land instead of sleeping
+# for a fixed guess or polling every 500 ms.
+_ROWS_ABOVE_JS = """
+const [css, n, timeoutMs, done] = arguments;
+const count = () => document.querySelectorAll(css).length;
+if (count() > n) return done(count());
+const obs = new MutationObserver(() => {
+  const c = count();
+  if (c > n) { clearTimeout(cap); obs.disconnect(); done(c); }
+});
+const cap = setTimeout(() => { obs.disconnect(); done(count()); }, timeoutMs);
+obs.observe(document.body, {childList: true, subtree: true});
+"""
+
+_SETTLED_JS = """
+const [css, quietMs, timeoutMs, done] = arguments;
+let quiet;
+const finish = () => { clearTimeout(quiet); clearTimeout(cap); obs.disconnect(); done(document.querySelectorAll(css).length); };
+const obs = new MutationObserver(() => { clearTimeout(quiet); quiet = setTimeout(finish, quietMs); });
+const cap = setTimeout(finish, timeoutMs);
+obs.observe(document.body, {childList: true, subtree: true});
+quiet = setTimeout(finish, quietMs);
+"""
+
+def _run_async(driver, script, *args, timeout):
+    driver.set_script_timeout(timeout + 5)
+    return int(driver.execute_async_script(script, *args) or 0)
+
+def wait_for_rows(driver, css, more_than, timeout=BATCH_TIMEOUT):
+    # → row count once it exceeds `more_than`, or the unchanged count after `timeout`
+    return _run_async(driver, _ROWS_ABOVE_JS, css, int(more_than), int(timeout * 1000), timeout=timeout)
+
+def wait_settled(driver, css, quiet_ms=SETTLE_MS, timeout=SETTLE_TIMEOUT):
+    # → row count once the page has gone `quiet_ms` without DOM mutations
+    return _run_async(driver, _SETTLED_JS, css, int(quiet_ms), int(timeout * 1000), timeout=timeout)
+
+# ======================= Instrumentation =======================
+class WaitLog:
+    # Per-batch wait time next to the fixed sleeps the loaders used to do at the
+    # same point, so the saving shows up in the run report. Shared by shard threads.
+    def __init__(self, backend=""):
+        self.backend = backend
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def record(self, label, rows_before, rows_after, waited, legacy_s):
+        metrics.BATCH_WAIT_SECONDS.observe(waited, backend=self.backend)
+        with self.lock:
+            self.batches.append({"batch": label, "rows": rows_after, "added": rows_after - rows_before,
+                                 "wait_s": round(waited, 3), "saved_s": round(legacy_s - waited, 3)})
+
+    def summary(self):
+        with self.lock: batches = list(self.batches)
+        return {"batches": len(batches), "wait_s": round(sum(b["wait_s"] for b in batches), 3),
+                "saved_s": round(sum(b["saved_s"] for b in batches), 3), "per_batch": batches}